@@ -13,4 +13,26 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
\ No newline at end of file
+django_application = get_asgi_application()
+
+from products.client import open_client, close_client  # noqa: E402  settings 로드 이후 import
+
+
+async def application(scope, receive, send):
+    """Django 는 ASGI lifespan 을 처리하지 않으므로 여기서 처리
+
+    startup  : FastAPI 호출용 공유 httpx 클라이언트 생성
+    shutdown : 커넥션 풀 정리
+    그 외 요청은 Django 로 전달
+    """
+    if scope['type'] != 'lifespan':
+        return await django_application(scope, receive, send)
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await open_client()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await close_client()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
\ No newline at end of file
@@ -124,4 +124,11 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # FastAPI URL
-FASTAPI_BASE_URL = 'http://localhost:8001'
\ No newline at end of file
+FASTAPI_BASE_URL = 'http://localhost:8001'
+# FastAPI 호출용 공유 httpx 클라이언트 (products/client.py)
+FASTAPI_HTTP_MAX_CONNECTIONS = 100       # 풀 전체 최대 커넥션 수
+FASTAPI_HTTP_MAX_KEEPALIVE = 20          # 유지(keep-alive)할 유휴 커넥션 수
+FASTAPI_HTTP_KEEPALIVE_EXPIRY = 30.0     # 유휴 커넥션 유지 시간(초)
+FASTAPI_HTTP_TIMEOUT = 5.0               # 읽기/쓰기/풀 대기 타임아웃(초)
+FASTAPI_HTTP_CONNECT_TIMEOUT = 2.0       # 연결 타임아웃(초)
+FASTAPI_ETAG_CACHE_SIZE = 256            # ETag 와 함께 보관할 GET 응답 수
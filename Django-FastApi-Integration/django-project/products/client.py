@@ -0,0 +1,138 @@
+# FastAPI 호출용 공유 httpx.AsyncClient
+# 요청마다 AsyncClient 를 새로 만들면 매번 TCP 연결을 새로 맺고 keep-alive 를 잃어버림
+# 프로세스 하나에 클라이언트 하나를 두고 커넥션 풀을 재사용
+#
+# AsyncClient 의 커넥션은 만들어진 이벤트 루프에 묶여있음
+#   - ASGI(uvicorn 등) : 서버 루프 하나가 계속 유지 -> lifespan startup 에서 만든 공유 클라이언트 사용
+#   - WSGI(runserver) : async 뷰가 요청마다 새 루프에서 실행 -> 요청 단위 임시 클라이언트로 대체
+#
+# GET 응답은 ETag 와 파싱된 JSON 을 같이 보관 (get_json)
+#   다음 요청에 If-None-Match 로 보내고 304 면 보관한 데이터를 그대로 사용 - 본문 전송/JSON 파싱 생략
+#
+# 요청 속도 제한 (FastAPI ratelimit.py)
+#   FastAPI 는 Django 서버 주소가 아니라 최종 사용자 주소로 제한해야 함 -> X-Forwarded-For 로 전달 (forwarded_headers)
+#   FastAPI 가 429 를 반환하면 RateLimited 예외 (check_rate_limit) - 뷰에서 사용자에게 429 로 응답
+import asyncio
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from django.conf import settings
+import httpx
+
+_client = None
+_client_loop = None
+
+# 경로 -> (ETag, 파싱된 JSON), 오래 안쓴 순서 (LRU)
+_etag_cache = OrderedDict()
+_etag_lock = threading.Lock()
+
+
+class RateLimited(Exception):
+    '''FastAPI 요청 속도 제한 초과 (429) - retry_after 초 후 재시도'''
+    def __init__(self, retry_after):
+        super().__init__(f'FastAPI rate limit exceeded, retry after {retry_after}s')
+        self.retry_after = retry_after
+
+
+def forwarded_headers(request):
+    '''Django 요청의 사용자 주소를 FastAPI 에 전달할 헤더
+
+    받은 X-Forwarded-For 가 있으면 뒤에 REMOTE_ADDR 를 덧붙임 (프록시 표준 방식)
+    FastAPI 는 오른쪽부터 신뢰하는 프록시를 건너뛰므로 앞쪽 값을 위조해도 실제 주소가 사용됨
+    '''
+    address = request.META.get('REMOTE_ADDR')
+    if not address:
+        return {}
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    return {'X-Forwarded-For': f'{forwarded}, {address}' if forwarded else address}
+
+
+def check_rate_limit(response):
+    '''429 면 RateLimited 예외 - raise_for_status 전에 호출'''
+    if response.status_code == 429:
+        raise RateLimited(response.headers.get('retry-after', '1'))
+
+
+def _build_client():
+    '''설정값으로 httpx 클라이언트 생성'''
+    limits = httpx.Limits(
+        max_connections=settings.FASTAPI_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.FASTAPI_HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=settings.FASTAPI_HTTP_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(
+        settings.FASTAPI_HTTP_TIMEOUT,
+        connect=settings.FASTAPI_HTTP_CONNECT_TIMEOUT,
+    )
+    return httpx.AsyncClient(base_url=settings.FASTAPI_BASE_URL, limits=limits, timeout=timeout)
+
+
+async def open_client():
+    '''공유 클라이언트 생성 - ASGI lifespan startup 에서 호출'''
+    global _client, _client_loop
+    if _client is None:
+        _client = _build_client()
+        _client_loop = asyncio.get_running_loop()
+    return _client
+
+
+async def close_client():
+    '''공유 클라이언트 종료 - ASGI lifespan shutdown 에서 호출, 남은 커넥션 정리'''
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+
+
+@asynccontextmanager
+async def fastapi_client():
+    '''FastAPI 호출에 사용할 클라이언트
+
+    async with fastapi_client() as client:
+        response = await client.get('/api/products')
+    '''
+    if _client is not None and _client_loop is asyncio.get_running_loop():
+        yield _client   # 공유 클라이언트는 닫지 않음
+        return
+    async with _build_client() as client:
+        yield client
+
+
+def _cached_response(path):
+    with _etag_lock:
+        entry = _etag_cache.get(path)
+        if entry is not None:
+            _etag_cache.move_to_end(path)
+        return entry
+
+
+def _store_response(path, etag, data):
+    with _etag_lock:
+        _etag_cache[path] = (etag, data)
+        _etag_cache.move_to_end(path)
+        while len(_etag_cache) > settings.FASTAPI_ETAG_CACHE_SIZE:
+            _etag_cache.popitem(last=False)
+
+
+async def get_json(client, path, headers=None):
+    '''조건부 GET - 내용이 바뀌지 않았으면(304) 이전에 파싱한 데이터를 반환
+
+    반환값은 다른 요청과 공유될 수 있으므로 수정하지 말 것
+    headers : 같이 보낼 헤더 (ex. forwarded_headers(request))
+    429 는 RateLimited, 그 외 오류 응답은 httpx.HTTPStatusError
+    '''
+    cached = _cached_response(path)
+    headers = dict(headers or {})
+    if cached:
+        headers['If-None-Match'] = cached[0]
+    response = await client.get(path, headers=headers)
+    if response.status_code == 304 and cached:
+        return cached[1]
+    check_rate_limit(response)
+    response.raise_for_status()
+    data = response.json()
+    etag = response.headers.get('etag')
+    if etag:
+        _store_response(path, etag, data)
+    return data
@@ -11,4 +11,6 @@ class ProductForm(forms.Form):
                     widget=forms.NumberInput(attrs={'min':0,'step':0.01,'placeholder':'제품가격을 입력하세요'}))
     stock = forms.IntegerField(initial=0, label='재고수량',
                     widget=forms.NumberInput(attrs={'min':0,'placeholder':'재고수량을 입력하세요'}))
- 
\ No newline at end of file
+ 
+    # 수정할 때 조회한 시점의 행 버전 - FastAPI 에 If-Match 로 전달 (다른 사람이 먼저 수정했으면 실패)
+    version = forms.IntegerField(required=False, widget=forms.HiddenInput())
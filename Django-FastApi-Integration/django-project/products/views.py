@@ -1,46 +1,56 @@
+from functools import wraps
+from django.http import HttpResponse
 from django.shortcuts import render, redirect
-from django.conf import settings
 import httpx
 from .forms import ProductForm
+from .client import fastapi_client, get_json, forwarded_headers, check_rate_limit, RateLimited
 from django.contrib import messages
 # Create your views here.
 
-FASTAPI_URL = settings.FASTAPI_BASE_URL
+# FastAPI 주소(settings.FASTAPI_BASE_URL)는 공유 클라이언트의 base_url 로 설정됨
+# 모든 요청에 사용자 주소를 전달 (forwarded_headers) - FastAPI 요청 속도 제한이 사용자별로 적용됨
 
-async def get_products():
-    async with httpx.AsyncClient() as client:  # 비동기 http 커넥션
+async def get_products(request):
+    async with fastapi_client() as client:  # 공유 커넥션 풀 사용
         try:
-            response = await client.get(f'{FASTAPI_URL}/api/products')
-            response.raise_for_status()  # 오류 발생시 예외 발생
-            return response.json()
+            # ETag 로 조건부 요청 - 바뀌지 않았으면 이전 결과 재사용
+            return await get_json(client, '/api/products', forwarded_headers(request))
         except httpx.HTTPError as e:
             print(f"Error fetching products: {e}")
             return []
 # 아이디에 대한 제품 조회 함수
-async def get_product(product_id):
-    async with httpx.AsyncClient() as client:  # 비동기 http 커넥션
+async def get_product(request, product_id):
+    async with fastapi_client() as client:  # 공유 커넥션 풀 사용
         try:
-            response = await client.get(f'{FASTAPI_URL}/api/products/{product_id}')
-            response.raise_for_status()  # 오류 발생시 예외 발생
-            return response.json()
+            return await get_json(client, f'/api/products/{product_id}', forwarded_headers(request))
         except httpx.HTTPError as e:
             print(f"Error fetching products: {e}")
             return None
 
-async def create_product(data):
-    async with httpx.AsyncClient() as client:  # 비동기 http 커넥션
+async def create_product(request, data):
+    async with fastapi_client() as client:  # 공유 커넥션 풀 사용
         try:
-            response = await client.post(f'{FASTAPI_URL}/api/products',json=data)
+            response = await client.post('/api/products',json=data,headers=forwarded_headers(request))
+            check_rate_limit(response)
             response.raise_for_status()  # 오류 발생시 예외 발생
             return response.json()
         except httpx.HTTPError as e:
             print(f"Error creating product: {e}")
             return None
 
-async def update_product(product_id, data):
-    async with httpx.AsyncClient() as client:  # 비동기 http 커넥션
+# 수정 충돌 - 조회 이후 다른 사용자가 먼저 수정함 (FastAPI 412)
+class ProductConflict(Exception):
+    pass
+
+async def update_product(request, product_id, data, version):
+    # If-Match 로 조회할 때의 버전을 보내서 그 사이 수정이 없었을 때만 반영 (FastAPI ETag 형식 "v<버전>")
+    headers = {'If-Match': f'"v{version}"' if version else '*', **forwarded_headers(request)}
+    async with fastapi_client() as client:  # 공유 커넥션 풀 사용
         try:
-            response = await client.put(f'{FASTAPI_URL}/api/products/{product_id}',json=data)
+            response = await client.put(f'/api/products/{product_id}',json=data,headers=headers)
+            if response.status_code == 412:
+                raise ProductConflict()
+            check_rate_limit(response)
             response.raise_for_status()  # 오류 발생시 예외 발생
             return response.json()
         except httpx.HTTPError as e:
@@ -48,13 +58,26 @@ async def update_product(product_id, data):
             return None
 
 
+# FastAPI 요청 속도 제한 초과 - 사용자에게도 429 + Retry-After (빈 목록/500 대신)
+def handle_rate_limit(view):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            return await view(request, *args, **kwargs)
+        except RateLimited as e:
+            return HttpResponse('요청이 너무 많습니다. 잠시 후 다시 시도하세요.', status=429,
+                                headers={'Retry-After': e.retry_after})
+    return wrapper
+
 ###############################################################################################################
 
+@handle_rate_limit
 async def product_list(request):
-    products = await get_products()
+    products = await get_products(request)
     return render(request,'products/product_list.html',{'products': products})
 
 
+@handle_rate_limit
 async def product_create(request):
     if request.method == 'GET':
         form = ProductForm()
@@ -62,8 +85,9 @@ async def product_create(request):
         form = ProductForm(request.POST)
         if form.is_valid():
             # 폼에서 데이터 추출
-            data = form.cleaned_data
-            result = await create_product(data)
+            data = dict(form.cleaned_data)
+            data.pop('version')  # 수정 화면에서만 사용
+            result = await create_product(request, data)
             if result:
                 messages.success(request, '제품이 성공적으로 생성되었습니다.')
                 return redirect('products:product_list')  # url 별칭
@@ -72,17 +96,27 @@ async def product_create(request):
     return render(request, 'products/product_form.html', {'form': form,'title':'제품등록'})
 
 
+@handle_rate_limit
 async def product_edit(request, product_id):
     # 아이디로 제품 조회 후 사용자가 전달한 값으로 업데이트 fastapi 요청
-    product = await get_product(product_id)
+    product = await get_product(request, product_id)
     if not product:
         messages.error(request, '제품을 찾을 수 없습니다.')
         return redirect('products:product_list')
     if request.method == 'POST':
         form = ProductForm(request.POST)
         if form.is_valid():
-            data = form.cleaned_data
-            result = await update_product(product_id, data)
+            data = dict(form.cleaned_data)
+            version = data.pop('version')
+            try:
+                result = await update_product(request, product_id, data, version)
+            except ProductConflict:
+                # 최신 값으로 폼을 다시 보여줌
+                messages.error(request, '다른 사용자가 먼저 수정했습니다. 최신 내용을 확인 후 다시 저장하세요.')
+                form = ProductForm(initial=product)
+                return render(request, 'products/product_form.html',
+                              {'form': form,'title':'제품수정'}
+                              )
             if result:
                 messages.success(request, '제품이 성공적으로 수정되었습니다.')
                 return redirect('products:product_list')
@@ -94,16 +128,18 @@ async def product_edit(request, product_id):
                   {'form': form,'title':'제품수정'}
                   )
 
+@handle_rate_limit
 async def product_delete(request, product_id):
     # 해당 아이디의 제품이 있는지 확인하고 삭제 요청을 FastAPI로 보냄
-    product = await get_product(product_id)    
+    product = await get_product(request, product_id)    
     if not product:
         messages.error(request, '제품을 찾을 수 없습니다.')
         return redirect('products:product_list')    
     if request.method == 'POST':
-        async with httpx.AsyncClient() as client:
+        async with fastapi_client() as client:
             try:
-                response = await client.delete(f'{FASTAPI_URL}/api/products/{product_id}')
+                response = await client.delete(f'/api/products/{product_id}',headers=forwarded_headers(request))
+                check_rate_limit(response)
                 response.raise_for_status()
                 messages.success(request, '제품이 성공적으로 삭제되었습니다.')
                 return redirect('products:product_list')
@@ -1,13 +1,31 @@
 """
 FastAPI 데이터베이스에 샘플 사용자 및 제품 데이터를 추가하는 스크립트
+
+부하 테스트용 대량 데이터 (bench_load.py)
+  python add_sample_data.py --users 100 --products 10000
+  -> loadtest1 ~ loadtest100 (PW: loadtest123), 부하테스트 제품1 ~ 10000
 """
+import argparse
+import random
+from sqlalchemy import func, insert, select
 from sqlalchemy.orm import Session
 from database import SessionLocal, engine
 import models
 from auth import get_password_hash
+import migrations
 
-# 데이터베이스 테이블 생성
+# 데이터베이스 테이블 생성 + 마이그레이션 (main.py 와 같은 순서)
+# 기존 DB 에 owner_id/version 컬럼, 인덱스, 검색 테이블이 없으면 추가한 뒤에 데이터를 넣음
 models.Base.metadata.create_all(bind=engine)
+migrations.upgrade(engine)
+
+# 부하 테스트 데이터
+LOAD_TEST_USER_PREFIX = "loadtest"
+LOAD_TEST_PASSWORD = "loadtest123"
+LOAD_TEST_PRODUCT_PREFIX = "부하테스트 제품"
+LOAD_TEST_BATCH_SIZE = 1000
+# 검색(FTS) 부하를 위해 설명에 섞어 넣는 단어
+LOAD_TEST_WORDS = ["노트북", "마우스", "키보드", "모니터", "웹캠", "헤드셋", "무선", "게이밍", "사무용", "휴대용"]
 
 
 def add_sample_users(db: Session):
@@ -135,8 +153,69 @@ def add_sample_products(db: Session, users: list):
             print(f"  이미 존재하는 제품: {existing_product.name}")
 
 
+def add_load_test_data(db: Session, users: int, products: int):
+    """부하 테스트용 사용자/제품 대량 추가
+
+    이미 있는 개수는 건너뛰고 모자란 만큼만 추가 - 같은 값으로 여러번 실행해도 결과가 같음
+    제품 내용은 번호로 정해지므로(random.Random(번호)) 매번 같은 데이터가 만들어짐
+    """
+    # argon2 해시는 한번에 수십 ms - 모든 부하 테스트 사용자가 같은 해시를 공유
+    existing_users = db.scalar(
+        select(func.count()).select_from(models.User)
+        .where(models.User.username.like(f"{LOAD_TEST_USER_PREFIX}%"))
+    )
+    if users > existing_users:
+        hashed_password = get_password_hash(LOAD_TEST_PASSWORD)
+        db.execute(insert(models.User), [
+            {
+                "username": f"{LOAD_TEST_USER_PREFIX}{i}",
+                "email": f"{LOAD_TEST_USER_PREFIX}{i}@example.com",
+                "full_name": f"부하테스트{i}",
+                "role": "user",
+                "hashed_password": hashed_password,
+                "is_active": True,
+            }
+            for i in range(existing_users + 1, users + 1)
+        ])
+        db.commit()
+    print(f" 부하 테스트 사용자: {max(users, existing_users)}명 (추가 {max(0, users - existing_users)})")
+
+    owner_ids = db.scalars(
+        select(models.User.id)
+        .where(models.User.username.like(f"{LOAD_TEST_USER_PREFIX}%"))
+        .order_by(models.User.id)
+    ).all()
+    existing_products = db.scalar(
+        select(func.count()).select_from(models.Product)
+        .where(models.Product.name.like(f"{LOAD_TEST_PRODUCT_PREFIX}%"))
+    )
+    if products > existing_products and not owner_ids:
+        print(" 부하 테스트 제품은 사용자가 있어야 추가할 수 있습니다 (--users)")
+        return
+    # 한번에 LOAD_TEST_BATCH_SIZE 행씩 executemany
+    for start in range(existing_products + 1, products + 1, LOAD_TEST_BATCH_SIZE):
+        rows = []
+        for i in range(start, min(start + LOAD_TEST_BATCH_SIZE, products + 1)):
+            rng = random.Random(i)
+            rows.append({
+                "name": f"{LOAD_TEST_PRODUCT_PREFIX}{i}",
+                "description": " ".join(rng.sample(LOAD_TEST_WORDS, 3)),
+                "price": rng.randrange(1000, 2000000, 100),
+                "stock": rng.randrange(0, 100),
+                "owner_id": owner_ids[i % len(owner_ids)],
+            })
+        db.execute(insert(models.Product), rows)
+        db.commit()
+    print(f" 부하 테스트 제품: {max(products, existing_products)}개 (추가 {max(0, products - existing_products)})")
+
+
 def main():
     """메인 함수"""
+    parser = argparse.ArgumentParser(description="샘플 데이터 추가")
+    parser.add_argument("--users", type=int, default=0, help="부하 테스트 사용자 수")
+    parser.add_argument("--products", type=int, default=0, help="부하 테스트 제품 수")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("샘플 데이터 추가 시작")
     print("=" * 60)
@@ -150,6 +229,10 @@ def main():
         # 제품 추가
         print("\n[제품 데이터 추가]")
         add_sample_products(db, users)
+
+        if args.users or args.products:
+            print("\n[부하 테스트 데이터 추가]")
+            add_load_test_data(db, args.users, args.products)
         
         print("\n" + "=" * 60)
         print("샘플 데이터 추가 완료!")
@@ -160,6 +243,8 @@ def main():
         print("매니저 계정 - ID: manager, PW: manager123")
         print("사용자 계정1 - ID: user1, PW: user123")
         print("사용자 계정2 - ID: user2, PW: user123")
+        if args.users:
+            print(f"부하 테스트 계정 - ID: {LOAD_TEST_USER_PREFIX}1 ~ {LOAD_TEST_USER_PREFIX}{args.users}, PW: {LOAD_TEST_PASSWORD}")
         print("-" * 60)
         
     except Exception as e:
@@ -2,50 +2,193 @@ from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
 from argon2 import PasswordHasher
+from argon2.exceptions import VerifyMismatchError
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from database import get_async_db
+from cache import LocalCache
+from metrics import ARGON2_SECONDS
 import models
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import os
 import secrets
+import threading
+import time
 # 보안 설정
 # secrets.token_urlsafe(64) 이 값을 한번 생성해서 .evn에 등록하고 사용해야 함(release 모드)
 SECRET_KEY = secrets.token_urlsafe(64)  # 서버실행시 기준 키를 재 발행.. 모든사용자 토큰 무효화 -> 강제 로그아웃
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-ph = PasswordHasher()
+# 인증 캐시 설정
+# 요청마다 JWT 디코딩 + 사용자 SELECT 를 하지 않도록 짧게 캐시
+AUTH_CACHE_TTL_SECONDS = 60
+AUTH_CACHE_MAX_ENTRIES = 10000
+
+# argon2 비용 설정 - 배포 환경(CPU/메모리)에 맞게 환경변수로 조정
+# 이미 저장된 해시는 해시 문자열 안에 파라미터가 들어있으므로 값을 바꿔도 검증 가능
+ARGON2_TIME_COST = int(os.getenv('ARGON2_TIME_COST', 3))
+ARGON2_MEMORY_COST = int(os.getenv('ARGON2_MEMORY_COST', 65536))  # KiB
+ARGON2_PARALLELISM = int(os.getenv('ARGON2_PARALLELISM', 4))
+
+# 해싱 전용 워커 풀
+# argon2 는 CPU 를 많이 쓰므로 요청 스레드풀에서 바로 실행하면 로그인이 몰릴 때 제품 조회까지 멈춤
+# 전용 풀(HASH_WORKERS)에서만 실행하고, 대기열(HASH_QUEUE_LIMIT)이 가득 차면 기다리지 않고 503 반환
+HASH_WORKERS = int(os.getenv('HASH_WORKERS', 4))
+HASH_QUEUE_LIMIT = int(os.getenv('HASH_QUEUE_LIMIT', 32))
+
+ph = PasswordHasher(
+    time_cost=ARGON2_TIME_COST,
+    memory_cost=ARGON2_MEMORY_COST,
+    parallelism=ARGON2_PARALLELISM,
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/token")  # 로그인 api 앤드포인트 지정, 아이디/패스워드를 보내서 토큰을 받음
 
+# argon2-cffi 는 해싱 중 GIL 을 놓기 때문에 스레드 풀로도 병렬 실행됨
+_hash_pool = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix='argon2')
+_hash_slots = threading.BoundedSemaphore(HASH_WORKERS + HASH_QUEUE_LIMIT)  # 실행중 + 대기중
+
+
+def _timed(operation: str, fn, *args):
+    '''풀 스레드에서 실행 - 해싱 시간 기록 (/metrics)'''
+    started = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        ARGON2_SECONDS.observe(time.perf_counter() - started, operation=operation)
+
+
+def _submit_hash_job(operation: str, fn, *args):
+    '''해싱 작업을 풀에 제출 - 자리가 없으면 503 (back-pressure)'''
+    if not _hash_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail='Password hashing is overloaded, retry later',
+            headers={"Retry-After": "1"},
+        )
+    try:
+        future = _hash_pool.submit(_timed, operation, fn, *args)
+    except BaseException:
+        _hash_slots.release()
+        raise
+    future.add_done_callback(lambda _: _hash_slots.release())
+    return future
+
+
+def _verify(hashed_password: str, plain_password: str) -> bool:
+    try:
+        return ph.verify(hashed_password, plain_password)
+    except VerifyMismatchError:  # 비밀번호 불일치는 예외로 전달됨
+        return False
+
 
+# 동기 버전 - 동기 라우터/스크립트에서 사용 (풀에서 끝날 때까지 대기)
 def get_password_hash(password: str) -> str:
-    return ph.hash(password)
+    return _submit_hash_job('hash', ph.hash, password).result()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return ph.verify(hashed_password, plain_password)
+    return _submit_hash_job('verify', _verify, hashed_password, plain_password).result()
+
+# 비동기 버전 - async 라우터에서 사용 (이벤트 루프를 막지 않음)
+async def get_password_hash_async(password: str) -> str:
+    return await asyncio.wrap_future(_submit_hash_job('hash', ph.hash, password))
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await asyncio.wrap_future(_submit_hash_job('verify', _verify, hashed_password, plain_password))
 
 
 def create_access_token(data:dict, expires_delta:Optional[timedelta]=None):
     '''액세스 토큰 생성'''
     to_encode = data.copy()
     if expires_delta:        
-        expire = datetime.now(datetime.timezone.utc) + expires_delta
+        expire = datetime.now(timezone.utc) + expires_delta
     else:
-        expire = datetime.now(datetime.timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def authenticate_user(db:Session, username:str, password:str):
+async def authenticate_user(db:AsyncSession, username:str, password:str):
     '''사용자 인증'''
-    user = db.query(models.User).filter(models.User.username == username).first()
+    result = await db.execute(select(models.User).where(models.User.username == username))
+    user = result.scalar_one_or_none()
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return False
     return user
 
-async def get_current_user(token:str = Depends(oauth2_scheme), db:Session = Depends(get_db)):
+# 인증 캐시
+# token_cache : 토큰 문자열 -> (username, 만료시각)   서명검증/디코딩 생략
+# user_cache  : username -> 사용자 컬럼값 dict        SELECT 생략
+# ORM 객체를 그대로 캐시하면 세션이 닫힌 뒤 사용할 수 없으므로 컬럼값만 저장하고
+# 요청의 세션에 merge(load=False) 로 붙여서 반환 (SQL 실행 없음)
+token_cache = LocalCache(maxsize=AUTH_CACHE_MAX_ENTRIES, ttl=AUTH_CACHE_TTL_SECONDS)
+user_cache = LocalCache(maxsize=AUTH_CACHE_MAX_ENTRIES, ttl=AUTH_CACHE_TTL_SECONDS)
+
+
+def _decode_token(token:str):
+    '''토큰 -> username, 검증된 토큰은 만료시각까지(최대 TTL) 캐시'''
+    cached = token_cache.get(token)
+    if cached is not None:
+        username, expires_at = cached
+        if expires_at is None or expires_at > time.time():
+            return username
+        token_cache.delete(token)
+    payload = jwt.decode(token,SECRET_KEY,algorithms=[ALGORITHM])
+    username:str = payload.get('sub')
+    if username is not None:
+        expires_at = payload.get('exp')
+        ttl = AUTH_CACHE_TTL_SECONDS
+        if expires_at is not None:
+            ttl = max(0, min(ttl, expires_at - time.time()))
+        token_cache.set(token, (username, expires_at), ttl=ttl)
+    return username
+
+
+def username_from_token(token:str) -> Optional[str]:
+    '''토큰 -> username, 유효하지 않으면 None (get_current_user 와 같은 검증, DB 조회 없음)'''
+    try:
+        return _decode_token(token)
+    except JWTError:
+        return None
+
+
+async def _load_user(db:AsyncSession, username:str):
+    '''username -> 요청 세션에 연결된 User 객체'''
+    data = user_cache.get(username)
+    if data is not None:
+        user = models.User(**data)
+        make_transient_to_detached(user)  # DB 에 있는 행으로 표시
+        return await db.merge(user, load=False)
+    result = await db.execute(select(models.User).where(models.User.username == username))
+    user = result.scalar_one_or_none()
+    if user is not None:
+        user_cache.set(username, {c.key: getattr(user, c.key) for c in models.User.__table__.columns})
+    return user
+
+
+def invalidate_user(username:str):
+    '''사용자 정보 변경/비활성화/삭제시 캐시 제거'''
+    user_cache.delete(username)
+
+
+# ORM 으로 사용자를 수정/삭제하면 자동으로 캐시 무효화
+# (query.update() 같은 벌크 SQL 은 이벤트가 발생하지 않으므로 invalidate_user 직접 호출)
+@event.listens_for(models.User, 'after_update')
+@event.listens_for(models.User, 'after_delete')
+def _on_user_changed(mapper, connection, target):
+    invalidate_user(target.username)
+    # username 이 바뀐 경우 이전 이름도 제거
+    for old_username in inspect(target).attrs.username.history.deleted or ():
+        invalidate_user(old_username)
+
+
+async def get_current_user(token:str = Depends(oauth2_scheme), db:AsyncSession = Depends(get_async_db)):
     '''현재 사용자 정보 가져오기'''
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -53,13 +196,12 @@ async def get_current_user(token:str = Depends(oauth2_scheme), db:Session = Depe
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token,SECRET_KEY,algorithms=[ALGORITHM])
-        username:str = payload.get('sub')
+        username = _decode_token(token)
         if username is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = db.query(models.User).filter(models.User.username == username).first()
+    user = await _load_user(db, username)
     if user is None:
         raise credentials_exception
     return user
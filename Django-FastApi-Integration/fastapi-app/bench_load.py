@@ -0,0 +1,393 @@
+"""
+부하 테스트 - 읽기/쓰기/인증 요청을 섞어서 보내고 처리량과 지연시간(p50/p95/p99)을 JSON 으로 출력
+
+대상
+  fastapi : FastAPI API 직접 호출
+            list(목록 커서 페이지 + 가격 필터) / detail / search / create / update(If-Match) / login(argon2)
+  django  : Django products 화면 -> 내부에서 FastAPI 호출 (연동 전체 경로)
+            page_list(목록) / page_edit(수정 폼) / page_update(폼 제출, CSRF 토큰은 수정 폼에서 받음)
+            page_create(등록 폼 제출) - 성공하면 목록으로 302, 폼이 다시 보이면(200) FastAPI 생성 실패이므로 오류로 집계
+            Django 화면에는 로그인이 없으므로 auth 비율은 무시
+
+속도 제한 (ratelimit.py) 은 켠 상태로 측정
+  실제 서비스처럼 요청마다 --clients 명의 사용자 주소 중 하나를 X-Forwarded-For 로 보냄
+  FastAPI 는 localhost 에서 온 X-Forwarded-For 를 신뢰 (RATE_LIMIT_TRUSTED_PROXIES) -> 사용자 주소별 버킷
+  Django 는 받은 X-Forwarded-For 에 자기 주소를 덧붙여 전달하므로 같은 주소로 제한됨
+  벤치마크를 다른 서버에서 실행하면 그 주소를 RATE_LIMIT_TRUSTED_PROXIES 에 추가
+  429 는 오류로 집계 - 처리량을 올리려면 --clients/--users 를 늘림 (사용자 한명당 요청 수가 줄어듦)
+
+실행 방법
+  1) 프로세스 내부 (기본값) - 임시 DB 에 데이터를 만들고 httpx ASGITransport 로 FastAPI 를 직접 호출
+     python bench_load.py --users 50 --products 5000 --duration 20 --concurrency 32
+  2) 실행중인 서버 - 미리 같은 수로 데이터를 넣어둠
+     python add_sample_data.py --users 50 --products 5000
+     uvicorn main:app --port 8001
+     uvicorn config.asgi:application --port 8000          (django-project)
+     python bench_load.py --users 50 --fastapi-url http://localhost:8001 --django-url http://localhost:8000
+
+요청 비율 : --mix read=80,write=15,auth=5  (종류 안에서는 동작을 고르게 선택)
+같은 --seed 면 같은 순서의 요청을 보냄
+
+결과 : --output result.json 으로 저장 (없으면 화면에 출력)
+회귀 검사 : --baseline baseline.json --max-regression 0.2
+  동작별 p95 가 기준보다 20% 넘게 느려지거나 처리량이 20% 넘게 줄면, 또는 오류율이 --max-error-rate 를 넘으면 종료코드 1
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+import httpx
+
+# 요청 종류별 동작 (대상, 종류) -> [동작 이름]
+OPERATIONS = {
+    ('fastapi', 'read'): ['list', 'detail', 'search'],
+    ('fastapi', 'write'): ['create', 'update'],
+    ('fastapi', 'auth'): ['login'],
+    ('django', 'read'): ['page_list', 'page_edit'],
+    ('django', 'write'): ['page_update', 'page_create'],
+}
+SEARCH_TERMS = ['노트북', '무선 마우스', '게이밍', '사무용 키보드', '휴대용']
+PERCENTILES = (50, 95, 99)
+
+CSRF_PATTERN = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+VERSION_PATTERN = re.compile(r'name="version" value="(\d+)"')
+
+
+def parse_mix(value: str) -> dict:
+    '''"read=80,write=15,auth=5" -> {'read': 80.0, ...}'''
+    mix = {}
+    for part in value.split(','):
+        kind, _, weight = part.partition('=')
+        mix[kind.strip()] = float(weight)
+    unknown = set(mix) - {'read', 'write', 'auth'}
+    if unknown:
+        raise SystemExit(f"unknown workload kind: {', '.join(sorted(unknown))} (read | write | auth)")
+    return mix
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    '''정렬된 값의 p 백분위 (nearest-rank)'''
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(samples: list, elapsed: float) -> dict:
+    '''[(지연 초, 상태코드)] -> 처리량/오류/지연시간 요약 (지연시간 ms)'''
+    latencies = sorted(latency * 1000 for latency, _ in samples)
+    statuses = Counter(status for _, status in samples)
+    errors = sum(count for status, count in statuses.items() if status == 0 or status >= 400)
+    summary = {
+        'requests': len(samples),
+        'errors': errors,
+        'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+        'throughput_rps': round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        'latency_ms': {f'p{p}': round(percentile(latencies, p), 2) for p in PERCENTILES},
+        'status': {str(status): count for status, count in sorted(statuses.items())},
+    }
+    summary['latency_ms']['mean'] = round(sum(latencies) / len(latencies), 2) if latencies else 0.0
+    summary['latency_ms']['max'] = round(latencies[-1], 2) if latencies else 0.0
+    return summary
+
+
+def client_address(number: int) -> str:
+    '''가상 사용자 번호 -> 사용자 주소 (10.x.y.z)'''
+    return f'10.{number >> 16 & 255}.{number >> 8 & 255}.{number & 255}'
+
+
+class Workload:
+    '''대상 하나에 보낼 요청 - 동작 이름을 받아서 (요청 결과 상태코드) 를 반환'''
+    def __init__(self, target: str, client: httpx.AsyncClient, mix: dict, product_ids: int, args):
+        self.target = target
+        self.client = client
+        self.product_ids = product_ids   # 1 ~ product_ids 사이에서 임의로 선택
+        self.users = args.users
+        self.password = args.password
+        self.clients = args.clients
+        self.choices = []
+        self.weights = []
+        for (name, kind), operations in OPERATIONS.items():
+            if name != target or not mix.get(kind):
+                continue
+            for operation in operations:
+                self.choices.append(operation)
+                self.weights.append(mix[kind] / len(operations))
+        if not self.choices:
+            raise SystemExit(f'{target}: no operations for mix {mix}')
+
+    def pick(self, rng: random.Random) -> str:
+        return rng.choices(self.choices, self.weights)[0]
+
+    async def run(self, operation: str, rng: random.Random, record):
+        await getattr(self, operation)(rng, record)
+
+    async def _timed(self, record, operation, method, url, rng, headers=None, expect=None, **kwargs):
+        # 요청을 보낸 사용자 주소 - 속도 제한 버킷이 실제 서비스처럼 사용자별로 나뉨
+        headers = {'X-Forwarded-For': client_address(rng.randint(1, self.clients)), **(headers or {})}
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=headers, **kwargs)
+            status_code = response.status_code
+        except httpx.HTTPError:
+            response, status_code = None, 0
+        if expect and status_code and status_code < 400 and status_code != expect:
+            # 폼 제출이 실패해도 Django 는 폼을 다시 보여줌(200) - 오류로 집계되도록 422 로 기록
+            status_code = 422
+        record(operation, time.perf_counter() - started, status_code)
+        return response
+
+    # FastAPI
+    async def list(self, rng, record):
+        # 가격 필터를 섞어서 캐시 적중/미적중이 함께 일어나도록 함
+        price_min = rng.randrange(0, 2000000, 10000)
+        await self._timed(record, 'list', 'GET', f'/api/products?cursor=&limit=20&price_min={price_min}', rng)
+
+    async def detail(self, rng, record):
+        await self._timed(record, 'detail', 'GET', f'/api/products/{rng.randint(1, self.product_ids)}', rng)
+
+    async def search(self, rng, record):
+        await self._timed(record, 'search', 'GET', '/api/products/search', rng, params={'q': rng.choice(SEARCH_TERMS)})
+
+    async def create(self, rng, record):
+        product = {'name': f'부하테스트 신규{rng.randrange(10 ** 9)}', 'description': '부하 테스트',
+                   'price': rng.randrange(1000, 100000), 'stock': rng.randrange(100)}
+        await self._timed(record, 'create', 'POST', '/api/products', rng, json=product)
+
+    async def update(self, rng, record):
+        # 버전 확인 없이 수정 (If-Match: *) - 동시 수정 충돌(412)은 측정 대상이 아님
+        await self._timed(record, 'update', 'PUT', f'/api/products/{rng.randint(1, self.product_ids)}',
+                          rng, json={'stock': rng.randrange(100)}, headers={'If-Match': '*'})
+
+    async def login(self, rng, record):
+        form = {'username': f'loadtest{rng.randint(1, self.users)}', 'password': self.password}
+        await self._timed(record, 'login', 'POST', '/api/auth/token', rng, data=form)
+
+    # Django
+    async def page_list(self, rng, record):
+        await self._timed(record, 'page_list', 'GET', '/', rng)
+
+    async def page_edit(self, rng, record):
+        await self._timed(record, 'page_edit', 'GET', f'/products/{rng.randint(1, self.product_ids)}/edit', rng)
+
+    async def page_update(self, rng, record):
+        # 실제 사용자처럼 수정 폼을 받고(page_edit 로 기록) 제출
+        product_id = rng.randint(1, self.product_ids)
+        page = await self._timed(record, 'page_edit', 'GET', f'/products/{product_id}/edit', rng)
+        if page is None or page.status_code != 200:
+            return
+        csrf = CSRF_PATTERN.search(page.text)
+        version = VERSION_PATTERN.search(page.text)
+        form = {
+            'csrfmiddlewaretoken': csrf.group(1) if csrf else '',
+            'name': f'부하테스트 제품{product_id}',
+            'description': '부하 테스트',
+            'price': rng.randrange(1000, 100000),
+            'stock': rng.randrange(100),
+            'version': version.group(1) if version else '',
+        }
+        # 성공하면 목록으로 302 - 따라가지 않음
+        await self._timed(record, 'page_update', 'POST', f'/products/{product_id}/edit', rng, data=form)
+
+    async def page_create(self, rng, record):
+        # 등록 폼을 받고(CSRF 토큰) 제출 - Django -> POST /api/products 경로
+        page = await self._timed(record, 'page_form', 'GET', '/products/create', rng)
+        if page is None or page.status_code != 200:
+            return
+        csrf = CSRF_PATTERN.search(page.text)
+        form = {
+            'csrfmiddlewaretoken': csrf.group(1) if csrf else '',
+            'name': f'부하테스트 신규{rng.randrange(10 ** 9)}',
+            'description': '부하 테스트',
+            'price': rng.randrange(1000, 100000),
+            'stock': rng.randrange(100),
+        }
+        await self._timed(record, 'page_create', 'POST', '/products/create', rng, data=form, expect=302)
+
+
+async def drive(workload: Workload, args) -> dict:
+    '''동시 사용자 concurrency 명이 duration 초(또는 requests 건) 동안 요청을 반복'''
+    samples = defaultdict(list)
+    warmup_left = args.warmup
+    recording = []   # 측정 시작 시각 (워밍업 이후)
+
+    def record(operation, latency, status_code):
+        nonlocal warmup_left
+        if warmup_left > 0:
+            warmup_left -= 1
+            if warmup_left == 0:
+                recording.append(time.perf_counter())
+            return
+        samples[operation].append((latency, status_code))
+
+    if warmup_left == 0:
+        recording.append(time.perf_counter())
+    budget = [args.requests]
+
+    async def user(index: int):
+        rng = random.Random(f'{args.seed}:{workload.target}:{index}')
+        while True:
+            if args.requests:
+                if budget[0] <= 0:
+                    return
+                budget[0] -= 1
+            elif recording and time.perf_counter() - recording[0] >= args.duration:
+                return
+            await workload.run(workload.pick(rng), rng, record)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user(i) for i in range(args.concurrency)))
+    elapsed = time.perf_counter() - (recording[0] if recording else started)
+
+    every = [sample for operation_samples in samples.values() for sample in operation_samples]
+    result = summarize(every, elapsed)
+    result['duration_s'] = round(elapsed, 2)
+    result['operations'] = {
+        operation: summarize(operation_samples, elapsed)
+        for operation, operation_samples in sorted(samples.items())
+    }
+    return result
+
+
+async def max_product_id(client: httpx.AsyncClient) -> int:
+    '''가장 큰 제품 id - detail/update 는 1 ~ 이 값 사이의 id 사용'''
+    response = await client.get('/api/products', params={'cursor': '', 'limit': 1, 'order': '-id'})
+    response.raise_for_status()
+    items = response.json()['items']
+    if not items:
+        raise SystemExit('no products - seed first (python add_sample_data.py --users N --products N)')
+    return items[0]['id']
+
+
+def seed_local(users: int, products: int):
+    '''프로세스 내부 실행 - 임시 디렉토리의 products.db 에 데이터 생성'''
+    from add_sample_data import add_load_test_data
+    from database import SessionLocal
+    db = SessionLocal()
+    try:
+        add_load_test_data(db, users, products)
+    finally:
+        db.close()
+
+
+def compare(result: dict, baseline: dict, max_regression: float, max_error_rate: float) -> list:
+    '''기준 결과와 비교 - 회귀 내용 목록 (없으면 빈 목록)'''
+    failures = []
+    for target, current in result['targets'].items():
+        if current['error_rate'] > max_error_rate:
+            failures.append(f"{target}: error rate {current['error_rate']:.2%} > {max_error_rate:.2%}")
+        base = baseline.get('targets', {}).get(target)
+        if base is None:
+            continue
+        pairs = [(target, current, base)] + [
+            (f'{target}.{operation}', stats, base['operations'][operation])
+            for operation, stats in current['operations'].items()
+            if operation in base.get('operations', {})
+        ]
+        for name, stats, base_stats in pairs:
+            p95, base_p95 = stats['latency_ms']['p95'], base_stats['latency_ms']['p95']
+            if base_p95 and p95 > base_p95 * (1 + max_regression):
+                failures.append(f'{name}: p95 {p95}ms > baseline {base_p95}ms (+{p95 / base_p95 - 1:.0%})')
+        rps, base_rps = current['throughput_rps'], base['throughput_rps']
+        if base_rps and rps < base_rps * (1 - max_regression):
+            failures.append(f'{target}: throughput {rps} req/s < baseline {base_rps} req/s ({rps / base_rps - 1:.0%})')
+    return failures
+
+
+async def run(args) -> dict:
+    mix = parse_mix(args.mix)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    targets = {}
+
+    if args.fastapi_url:
+        fastapi = httpx.AsyncClient(base_url=args.fastapi_url, limits=limits, timeout=args.timeout)
+    else:
+        import main
+        seed_local(args.users, args.products)
+        transport = httpx.ASGITransport(app=main.app, raise_app_exceptions=False)   # 500 도 오류로 기록
+        fastapi = httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=args.timeout)
+    async with fastapi:
+        product_ids = await max_product_id(fastapi)
+        if 'fastapi' in args.targets:
+            targets['fastapi'] = await drive(Workload('fastapi', fastapi, mix, product_ids, args), args)
+
+    if 'django' in args.targets:
+        # CSRF 쿠키를 요청마다 주고받도록 사용자(클라이언트) 하나가 쿠키를 유지
+        async with httpx.AsyncClient(base_url=args.django_url, limits=limits, timeout=args.timeout) as django:
+            targets['django'] = await drive(Workload('django', django, mix, product_ids, args), args)
+
+    if not args.fastapi_url:
+        from database import async_engine
+        await async_engine.dispose()   # aiosqlite 연결 스레드 정리 (없으면 프로세스가 끝나지 않음)
+
+    return {
+        'config': {
+            'mix': mix, 'concurrency': args.concurrency, 'duration_s': args.duration,
+            'requests': args.requests, 'warmup': args.warmup, 'seed': args.seed,
+            'users': args.users, 'clients': args.clients, 'products': product_ids,
+            'fastapi_url': args.fastapi_url or 'in-process', 'django_url': args.django_url,
+        },
+        'targets': targets,
+    }
+
+
+def main_():
+    parser = argparse.ArgumentParser(description='FastAPI / Django 연동 부하 테스트')
+    parser.add_argument('--fastapi-url', help='실행중인 FastAPI 주소 (없으면 프로세스 내부에서 실행)')
+    parser.add_argument('--django-url', help='실행중인 Django 주소 (있으면 django 대상도 측정)')
+    parser.add_argument('--users', type=int, default=20, help='부하 테스트 사용자 수 (로그인에 사용)')
+    parser.add_argument('--clients', type=int, default=1000, help='요청을 보내는 사용자 주소 수 (X-Forwarded-For, 속도 제한 단위)')
+    parser.add_argument('--password', default='loadtest123', help='부하 테스트 사용자 비밀번호 (add_sample_data.py)')
+    parser.add_argument('--products', type=int, default=2000, help='부하 테스트 제품 수 (프로세스 내부 실행시 생성)')
+    parser.add_argument('--mix', default='read=80,write=15,auth=5', help='요청 종류 비율')
+    parser.add_argument('--concurrency', type=int, default=16, help='동시 사용자 수')
+    parser.add_argument('--duration', type=float, default=10, help='대상별 측정 시간(초)')
+    parser.add_argument('--requests', type=int, default=0, help='대상별 요청 수 (주면 --duration 대신 사용)')
+    parser.add_argument('--warmup', type=int, default=50, help='측정에서 제외할 처음 요청 수')
+    parser.add_argument('--seed', type=int, default=1, help='요청 순서 시드')
+    parser.add_argument('--timeout', type=float, default=30, help='요청 타임아웃(초)')
+    parser.add_argument('--output', help='결과 JSON 파일 (없으면 화면에 출력)')
+    parser.add_argument('--baseline', help='비교할 기준 결과 JSON')
+    parser.add_argument('--max-regression', type=float, default=0.2, help='허용하는 p95/처리량 변화 비율')
+    parser.add_argument('--max-error-rate', type=float, default=0.01, help='허용하는 오류율')
+    args = parser.parse_args()
+    args.targets = ['fastapi'] + (['django'] if args.django_url else [])
+
+    if not args.fastapi_url:
+        # main 을 import 하기 전에 설정 - 임시 DB (ASGITransport 의 클라이언트 주소는 127.0.0.1 이라 X-Forwarded-For 를 신뢰)
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        os.chdir(tempfile.mkdtemp(prefix='bench_load_'))
+
+    result = asyncio.run(run(args))
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        for key in ('mix', 'concurrency', 'fastapi_url', 'django_url'):
+            if baseline['config'].get(key) != result['config'][key]:
+                print(f"warning: baseline {key}={baseline['config'].get(key)} differs from {result['config'][key]}", file=sys.stderr)
+        failures = compare(result, baseline, args.max_regression, args.max_error_rate)
+        for failure in failures:
+            print(f'REGRESSION {failure}', file=sys.stderr)
+        if failures:
+            sys.exit(1)
+    elif any(t['error_rate'] > args.max_error_rate for t in result['targets'].values()):
+        print('error rate above --max-error-rate', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_()
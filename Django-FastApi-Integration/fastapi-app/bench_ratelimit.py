@@ -0,0 +1,104 @@
+"""
+요청 속도 제한(ratelimit.py) 오버헤드 벤치마크
+
+store    : LocalBucketStore.take() 한번의 비용 (키 여러개를 번갈아 사용)
+request  : GET /api/products/1 (캐시 적중) 전체 처리 시간 - 제한 끔 / 켬 비교
+           제한에 걸리지 않도록 RATE_LIMIT_PRODUCTS 를 크게 설정하고 측정
+
+임시 디렉토리에 products.db 를 만들고 httpx ASGITransport 로 앱을 직접 호출 (네트워크 제외)
+
+실행 : python bench_ratelimit.py --calls 200000 --requests 3000
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# main 을 import 하기 전에 설정 (DB 파일 위치, 제한값)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.chdir(tempfile.mkdtemp(prefix='bench_ratelimit_'))
+os.environ['RATE_LIMIT_PRODUCTS'] = '1000000,1000000'
+
+import httpx
+import main
+import models
+from database import SessionLocal, async_engine
+from ratelimit import LocalBucketStore, limiter
+
+
+def bench_store(calls:int, keys:int) -> dict:
+    store = LocalBucketStore()
+    names = [f'products:ip:10.0.{i // 256}.{i % 256}' for i in range(keys)]
+    started = time.perf_counter()
+    for i in range(calls):
+        store.take(names[i % keys], 1000000, 1000000)
+    elapsed = time.perf_counter() - started
+    return {'case': 'store.take', 'keys': keys, 'ns_per_call': round(elapsed / calls * 1e9, 1)}
+
+
+async def bench_requests(count:int, enabled:bool) -> dict:
+    limiter.enabled = enabled
+    transport = httpx.ASGITransport(app=main.app)
+    timings = []
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        await client.get('/api/products/1')   # 캐시 채우기
+        for _ in range(count):
+            started = time.perf_counter()
+            response = await client.get('/api/products/1')
+            timings.append((time.perf_counter() - started) * 1e6)
+            if response.status_code != 200:
+                raise SystemExit(f'unexpected status {response.status_code}')
+    return {
+        'case': 'request', 'rate_limit': enabled,
+        'median_us': round(statistics.median(timings), 1),
+        'p99_us': round(sorted(timings)[int(len(timings) * 0.99) - 1], 1),
+    }
+
+
+def seed():
+    db = SessionLocal()
+    user = models.User(username='bench', email='bench@example.com', hashed_password='-')
+    db.add(user)
+    db.commit()
+    db.add(models.Product(name='제품', price=1000, stock=1, owner_id=user.id))
+    db.commit()
+    db.close()
+
+
+async def run(args) -> list:
+    seed()
+    results = [bench_store(args.calls, args.keys)]
+    for enabled in (False, True):
+        results.append(await bench_requests(args.requests, enabled))
+    await async_engine.dispose()   # aiosqlite 연결 스레드 정리 (없으면 프로세스가 끝나지 않음)
+    return results
+
+
+def main_():
+    parser = argparse.ArgumentParser(description='요청 속도 제한 오버헤드 벤치마크')
+    parser.add_argument('--calls', type=int, default=200000, help='store.take 호출 수')
+    parser.add_argument('--keys', type=int, default=1000, help='번갈아 사용할 버킷 키 수')
+    parser.add_argument('--requests', type=int, default=3000, help='요청 수 (제한 끔/켬 각각)')
+    parser.add_argument('--json', action='store_true', help='결과를 JSON 한 줄씩 출력')
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.json:
+        for result in results:
+            print(json.dumps(result))
+        return
+    store, off, on = results
+    print("=" * 60)
+    print(f"store.take ({store['keys']} keys)  : {store['ns_per_call']} ns/call")
+    print(f"request  rate limit off : median {off['median_us']} us, p99 {off['p99_us']} us")
+    print(f"request  rate limit on  : median {on['median_us']} us, p99 {on['p99_us']} us")
+    print(f"overhead (median)       : {on['median_us'] - off['median_us']:.1f} us/request")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,127 @@
+"""
+제품 목록 직렬화 경로 벤치마크 - 페이지 하나를 만드는 시간(조회 + JSON) 비교
+
+orm_stdlib : 이전 기본 경로  select(Product) -> ORM 객체 -> schemas.Product 검증 -> jsonable_encoder -> json.dumps
+orm_adapter : 이전 캐시 경로  select(Product) -> ORM 객체 -> TypeAdapter 검증 -> pydantic dump_json
+rows_orjson : 현재 경로      select(컬럼들) -> Row 튜플 -> dict -> orjson (serializers.py)
+
+임시 DB 파일에 제품을 만들고 비동기 엔진(aiosqlite)으로 main.py 와 같은 조건으로 측정
+결과 JSON 이 같은지도 확인
+
+실행 : python bench_serialization.py --rows 5000 --page 100 --repeat 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from typing import List
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+from database import build_async_engine
+from serializers import product_rows, dump_products
+import models
+import schemas
+
+product_list_adapter = TypeAdapter(List[schemas.Product])
+
+
+async def orm_stdlib(db, limit):
+    products = (await db.scalars(select(models.Product).order_by(models.Product.id).limit(limit))).all()
+    items = [schemas.Product.model_validate(p, from_attributes=True) for p in products]
+    return json.dumps(jsonable_encoder(items), ensure_ascii=False, separators=(',', ':'))
+
+
+async def orm_adapter(db, limit):
+    products = (await db.scalars(select(models.Product).order_by(models.Product.id).limit(limit))).all()
+    return product_list_adapter.dump_json(
+        product_list_adapter.validate_python(products, from_attributes=True)
+    ).decode()
+
+
+async def rows_orjson(db, limit):
+    result = await db.execute(product_rows().order_by(models.Product.id).limit(limit))
+    return dump_products(result.all())
+
+
+PATHS = {
+    'orm_stdlib': orm_stdlib,
+    'orm_adapter': orm_adapter,
+    'rows_orjson': rows_orjson,
+}
+
+
+async def seed(Session, rows:int):
+    async with Session() as db:
+        user = models.User(username='bench', email='bench@example.com', hashed_password='-')
+        db.add(user)
+        await db.commit()
+        await db.execute(insert(models.Product), [
+            {'name': f'제품{i}', 'description': f'벤치마크용 제품 설명 {i}', 'price': i * 1.5,
+             'stock': i % 10, 'owner_id': user.id}
+            for i in range(rows)
+        ])
+        await db.commit()
+
+
+async def run(rows:int, page:int, repeat:int) -> list:
+    tmpdir = tempfile.mkdtemp(prefix='bench_serialization_')
+    engine = build_async_engine(f'sqlite+aiosqlite:///{os.path.join(tmpdir, "bench.db")}', 'development')
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    Session = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+    await seed(Session, rows)
+
+    # 세 경로의 결과가 같은 JSON 인지 확인
+    async with Session() as db:
+        bodies = {name: json.loads(await path(db, page)) for name, path in PATHS.items()}
+    if any(body != bodies['orm_stdlib'] for body in bodies.values()):
+        raise SystemExit('직렬화 결과가 서로 다름')
+
+    results = []
+    for name, path in PATHS.items():
+        timings = []
+        for _ in range(repeat):
+            # 요청마다 새 세션 (identity map 이 비어있는 상태)
+            async with Session() as db:
+                started = time.perf_counter()
+                await path(db, page)
+                timings.append((time.perf_counter() - started) * 1000)
+        results.append({
+            'path': name,
+            'page': page,
+            'median_ms': round(statistics.median(timings), 3),
+            'pages_per_sec': round(1000 / statistics.mean(timings), 1),
+        })
+    await engine.dispose()
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='제품 목록 직렬화 경로 벤치마크')
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--page', type=int, default=100, help='한 페이지 제품 수')
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--json', action='store_true', help='결과를 JSON 한 줄씩 출력')
+    args = parser.parse_args()
+
+    results = await run(args.rows, args.page, args.repeat)
+    if args.json:
+        for result in results:
+            print(json.dumps(result))
+        return
+    base = results[0]['median_ms']
+    print("=" * 60)
+    print(f"{'path':<14}{'median ms':>12}{'pages/s':>12}{'speedup':>12}")
+    print("-" * 60)
+    for r in results:
+        print(f"{r['path']:<14}{r['median_ms']:>12}{r['pages_per_sec']:>12}{base / r['median_ms']:>11.1f}x")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
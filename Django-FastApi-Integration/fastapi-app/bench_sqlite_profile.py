@@ -0,0 +1,118 @@
+"""
+SQLite 프로필(development / production) 동시 읽기/쓰기 성능 비교 벤치마크
+
+임시 DB 파일을 프로필마다 새로 만들고, 읽기 스레드와 쓰기 스레드를 동시에 실행해서
+초당 처리량과 잠금 오류(database is locked) 수를 비교
+
+실행 : python bench_sqlite_profile.py --seconds 5 --readers 8 --writers 2
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from database import build_engine, DB_PROFILES
+import models
+
+SEED_PRODUCTS = 1000
+
+
+def seed(SessionBench):
+    '''기본 사용자 1명 + 제품 SEED_PRODUCTS 개'''
+    with SessionBench() as db:
+        user = models.User(username='bench', email='bench@example.com', hashed_password='-')
+        db.add(user)
+        db.flush()
+        db.add_all([
+            models.Product(name=f'제품{i}', description='벤치마크', price=i, stock=i % 50, owner_id=user.id)
+            for i in range(SEED_PRODUCTS)
+        ])
+        db.commit()
+        return user.id
+
+
+def run_profile(profile:str, seconds:float, readers:int, writers:int) -> dict:
+    '''한 프로필에 대해 읽기/쓰기 스레드를 동시에 실행'''
+    tmpdir = tempfile.mkdtemp(prefix='bench_sqlite_')
+    engine = build_engine(f'sqlite:///{os.path.join(tmpdir, "bench.db")}', profile)
+    models.Base.metadata.create_all(bind=engine)
+    SessionBench = sessionmaker(autoflush=False, bind=engine)
+    owner_id = seed(SessionBench)
+
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def add(key):
+        with lock:
+            counts[key] += 1
+
+    def reader():
+        while time.perf_counter() < deadline:
+            with SessionBench() as db:
+                try:
+                    db.execute(
+                        select(models.Product).where(models.Product.id == random.randint(1, SEED_PRODUCTS))
+                    ).scalar_one_or_none()
+                    add('reads')
+                except OperationalError:
+                    add('errors')
+
+    def writer():
+        while time.perf_counter() < deadline:
+            with SessionBench() as db:
+                try:
+                    db.add(models.Product(name='신규', price=1, stock=1, owner_id=owner_id))
+                    db.commit()
+                    add('writes')
+                except OperationalError:
+                    db.rollback()
+                    add('errors')
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    engine.dispose()
+
+    return {
+        'profile': profile,
+        'seconds': seconds,
+        'readers': readers,
+        'writers': writers,
+        'reads_per_sec': round(counts['reads'] / seconds, 1),
+        'writes_per_sec': round(counts['writes'] / seconds, 1),
+        'errors': counts['errors'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite 프로필 동시성 벤치마크')
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--json', action='store_true', help='결과를 JSON 한 줄씩 출력')
+    args = parser.parse_args()
+
+    results = [run_profile(profile, args.seconds, args.readers, args.writers) for profile in DB_PROFILES]
+    if args.json:
+        for result in results:
+            print(json.dumps(result))
+        return
+    print("=" * 60)
+    print(f"{'profile':<14}{'reads/s':>12}{'writes/s':>12}{'errors':>10}")
+    print("-" * 60)
+    for r in results:
+        print(f"{r['profile']:<14}{r['reads_per_sec']:>12}{r['writes_per_sec']:>12}{r['errors']:>10}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
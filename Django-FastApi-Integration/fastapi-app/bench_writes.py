@@ -0,0 +1,137 @@
+"""
+제품 쓰기 경로 벤치마크 - 초당 쓰기 수(writes/sec) 비교
+
+refresh : 이전 방식  add + commit + refresh / get + setattr + commit + refresh / get + delete + commit
+returning : 현재 방식  INSERT/UPDATE/DELETE ... RETURNING 한 문장 + commit
+
+임시 DB 파일에서 비동기 엔진(aiosqlite)으로 요청 하나당 세션 하나를 사용해서 main.py 와 같은 조건으로 측정
+
+실행 : python bench_writes.py --rows 2000 --profile production
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from sqlalchemy import insert, update, delete
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+from database import build_async_engine, DB_PROFILES
+import models
+
+
+async def create_refresh(Session, owner_id, i):
+    async with Session() as db:
+        product = models.Product(name=f'제품{i}', price=i, stock=1, owner_id=owner_id)
+        db.add(product)
+        await db.commit()
+        await db.refresh(product)
+        return product.id
+
+
+async def create_returning(Session, owner_id, i):
+    async with Session() as db:
+        product = (await db.scalars(
+            insert(models.Product)
+            .values(name=f'제품{i}', price=i, stock=1, owner_id=owner_id)
+            .returning(models.Product)
+        )).one()
+        await db.commit()
+        return product.id
+
+
+async def update_refresh(Session, product_id):
+    async with Session() as db:
+        product = await db.get(models.Product, product_id)
+        product.price = product.price + 1
+        await db.commit()
+        await db.refresh(product)
+
+
+async def update_returning(Session, product_id):
+    async with Session() as db:
+        (await db.scalars(
+            update(models.Product)
+            .where(models.Product.id == product_id)
+            .values(price=models.Product.price + 1)
+            .returning(models.Product)
+        )).one_or_none()
+        await db.commit()
+
+
+async def delete_refresh(Session, product_id):
+    async with Session() as db:
+        product = await db.get(models.Product, product_id)
+        await db.delete(product)
+        await db.commit()
+
+
+async def delete_returning(Session, product_id):
+    async with Session() as db:
+        (await db.scalars(
+            delete(models.Product).where(models.Product.id == product_id).returning(models.Product.id)
+        )).one_or_none()
+        await db.commit()
+
+
+PATTERNS = {
+    'refresh': (create_refresh, update_refresh, delete_refresh),
+    'returning': (create_returning, update_returning, delete_returning),
+}
+
+
+async def run_pattern(pattern:str, rows:int, profile:str) -> dict:
+    tmpdir = tempfile.mkdtemp(prefix='bench_writes_')
+    engine = build_async_engine(f'sqlite+aiosqlite:///{os.path.join(tmpdir, "bench.db")}', profile)
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    Session = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+    async with Session() as db:
+        user = models.User(username='bench', email='bench@example.com', hashed_password='-')
+        db.add(user)
+        await db.commit()
+        owner_id = user.id
+
+    create, modify, remove = PATTERNS[pattern]
+    result = {'pattern': pattern, 'profile': profile, 'rows': rows}
+
+    started = time.perf_counter()
+    ids = [await create(Session, owner_id, i) for i in range(rows)]
+    result['create_per_sec'] = round(rows / (time.perf_counter() - started), 1)
+
+    started = time.perf_counter()
+    for product_id in ids:
+        await modify(Session, product_id)
+    result['update_per_sec'] = round(rows / (time.perf_counter() - started), 1)
+
+    started = time.perf_counter()
+    for product_id in ids:
+        await remove(Session, product_id)
+    result['delete_per_sec'] = round(rows / (time.perf_counter() - started), 1)
+
+    await engine.dispose()
+    return result
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='제품 쓰기 경로 벤치마크')
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--profile', choices=list(DB_PROFILES), default='production')
+    parser.add_argument('--json', action='store_true', help='결과를 JSON 한 줄씩 출력')
+    args = parser.parse_args()
+
+    results = [await run_pattern(pattern, args.rows, args.profile) for pattern in PATTERNS]
+    if args.json:
+        for result in results:
+            print(json.dumps(result))
+        return
+    print("=" * 60)
+    print(f"{'pattern':<12}{'create/s':>14}{'update/s':>14}{'delete/s':>14}")
+    print("-" * 60)
+    for r in results:
+        print(f"{r['pattern']:<12}{r['create_per_sec']:>14}{r['update_per_sec']:>14}{r['delete_per_sec']:>14}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,140 @@
+# 제품 대량 생성/수정/삭제
+# 한 건씩 처리하면 행마다 왕복 + commit(fsync) 이 발생하므로
+# 요청 전체를 하나의 트랜잭션에서 executemany 형태의 문장으로 처리
+#   - 생성 : INSERT ... VALUES (...), (...) RETURNING id   (bulk_insert_mappings 에 해당)
+#   - 수정 : 기본키 기준 UPDATE executemany                (bulk_update_mappings 에 해당)
+#   - 삭제 : DELETE ... WHERE id IN (...) RETURNING id
+# 잘못된 항목은 건너뛰고 항목별 결과(status)로 알려줌 (바꿀 필드가 없는 수정 항목은 unchanged)
+import json
+from pydantic import ValidationError
+from sqlalchemy import insert, update, delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+import models
+import schemas
+
+BULK_MAX_ITEMS = 50000   # 요청 하나에 허용하는 최대 항목 수
+CHUNK_SIZE = 1000        # 문장 하나에 넣는 항목 수 (SQLite 바인딩 변수 개수 제한 대비)
+
+
+def _chunks(items:list):
+    for start in range(0, len(items), CHUNK_SIZE):
+        yield items[start:start + CHUNK_SIZE]
+
+
+def parse_items(body:bytes, content_type:str) -> list:
+    '''요청 본문 -> 항목 목록
+
+    application/x-ndjson : 한 줄에 JSON 하나, 잘못된 줄은 해당 위치에 ValueError 를 넣어서 항목별 오류로 처리
+    그 외               : JSON 배열, 전체가 잘못되면 ValueError
+    '''
+    if 'ndjson' in content_type:
+        items = []
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as e:
+                items.append(ValueError(f'Invalid JSON line: {e}'))
+    else:
+        items = json.loads(body)
+        if not isinstance(items, list):
+            raise ValueError('Request body must be a JSON array or NDJSON')
+    if len(items) > BULK_MAX_ITEMS:
+        raise ValueError(f'Too many items (max {BULK_MAX_ITEMS})')
+    return items
+
+
+def validate_items(items:list, schema):
+    '''항목별 스키마 검증 -> ([(index, 모델)], [실패 결과])'''
+    valid, failed = [], []
+    for index, item in enumerate(items):
+        if isinstance(item, ValueError):
+            failed.append(schemas.BulkItemResult(index=index, status='invalid', detail=str(item)))
+            continue
+        if schema is schemas.ProductBulkDelete and isinstance(item, int):
+            item = {'id': item}
+        try:
+            valid.append((index, schema.model_validate(item)))
+        except ValidationError as e:
+            failed.append(schemas.BulkItemResult(
+                index=index, status='invalid', detail=e.errors(include_url=False)[0]['msg']
+            ))
+    return valid, failed
+
+
+async def _existing_ids(db:AsyncSession, ids:list) -> set:
+    found = set()
+    for chunk in _chunks(ids):
+        result = await db.execute(select(models.Product.id).where(models.Product.id.in_(chunk)))
+        found.update(result.scalars().all())
+    return found
+
+
+async def bulk_create(db:AsyncSession, valid:list, owner_id:int) -> list:
+    '''INSERT ... RETURNING id - 요청 순서대로 id 를 돌려받음'''
+    results = []
+    for chunk in _chunks(valid):
+        rows = [dict(item.model_dump(), owner_id=owner_id) for _, item in chunk]
+        result = await db.execute(
+            insert(models.Product).returning(models.Product.id, sort_by_parameter_order=True),
+            rows
+        )
+        for (index, _), new_id in zip(chunk, result.scalars().all()):
+            results.append(schemas.BulkItemResult(index=index, status='created', id=new_id))
+    return results
+
+
+async def bulk_update(db:AsyncSession, valid:list) -> list:
+    '''존재하는 id 만 골라서 기본키 기준 UPDATE executemany'''
+    existing = await _existing_ids(db, [item.id for _, item in valid])
+    results, rows = [], []
+    for index, item in valid:
+        if item.id not in existing:
+            results.append(schemas.BulkItemResult(
+                index=index, status='not_found', id=item.id, detail=f"Product not found with id {item.id}"
+            ))
+            continue
+        row = item.model_dump(exclude_unset=True)  # 전달된 필드만 업데이트
+        if len(row) == 1:
+            # id 만 있고 바꿀 필드가 없음 - UPDATE 하지 않음 (버전도 그대로)
+            results.append(schemas.BulkItemResult(index=index, status='unchanged', id=item.id))
+            continue
+        rows.append(row)
+        results.append(schemas.BulkItemResult(index=index, status='updated', id=item.id))
+    for chunk in _chunks(rows):
+        # 행 버전도 같이 올려서 이전 버전으로 요청한 단건 수정(If-Match)이 412 가 되도록 함
+        await db.execute(update(models.Product).values(version=models.Product.version + 1), chunk)
+    return results
+
+
+async def bulk_delete(db:AsyncSession, valid:list) -> list:
+    '''DELETE ... WHERE id IN (...) RETURNING id'''
+    deleted = set()
+    for chunk in _chunks([item.id for _, item in valid]):
+        result = await db.execute(
+            delete(models.Product).where(models.Product.id.in_(chunk)).returning(models.Product.id),
+            execution_options={'synchronize_session': False}
+        )
+        deleted.update(result.scalars().all())
+    results = []
+    for index, item in valid:
+        if item.id in deleted:
+            results.append(schemas.BulkItemResult(index=index, status='deleted', id=item.id))
+        else:
+            results.append(schemas.BulkItemResult(
+                index=index, status='not_found', id=item.id, detail=f"Product not found with id {item.id}"
+            ))
+    return results
+
+
+def summarize(results:list) -> schemas.BulkResult:
+    '''항목별 결과를 요청 순서로 정렬해서 집계'''
+    results.sort(key=lambda r: r.index)
+    failed = sum(1 for r in results if r.status in ('invalid', 'not_found'))
+    return schemas.BulkResult(
+        total=len(results),
+        succeeded=len(results) - failed,
+        failed=failed,
+        results=results,
+    )
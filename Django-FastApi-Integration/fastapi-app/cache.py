@@ -0,0 +1,158 @@
+# 제품 조회 응답 캐시 (read-through)
+# 제품 목록/상세는 자주 바뀌지 않으므로 직렬화된 JSON 을 캐시해서
+# SQLite 조회 + schemas.Product 검증/직렬화를 건너뜀
+#
+# 백엔드 교체 가능
+#   - LocalCache : 프로세스 내부 TTL + LRU (기본값, 워커마다 따로 가짐)
+#   - RedisCache : Redis 호환 클라이언트(redis-py, 로컬 대체 서버 등) - 워커끼리 공유
+#   configure(RedisCache(redis.Redis(...))) 로 교체
+#
+# 무효화 - 키에 세대(generation) 번호가 들어가므로 번호를 올리면 이전 세대 키는 더 이상 조회되지 않고 TTL/LRU 로 정리됨
+#   - 상세 : 수정/삭제된 제품의 세대 번호를 올림
+#            조회 도중 수정되면 조회 결과는 이전 세대 키에 저장됨 -> 수정 전 본문(이전 ETag)이 다시 보이지 않음
+#   - 목록 : 쓰기가 있으면 페이지 구성이 바뀔 수 있으므로 목록 세대 번호를 올림
+# LocalCache 는 워커마다 따로 가지므로 다른 워커의 무효화가 보이지 않음 - 다른 워커의 수정은 최대 TTL 동안 이전 본문
+#   캐시 적중은 DB 를 조회하지 않음 (행 버전 확인 없음)
+#   이전 ETag 로 수정하면 412 - 그 워커는 그때 상세를 무효화하므로 다시 조회하면 최신 ETag (main.py update_product)
+#   워커끼리 바로 반영해야 하면 RedisCache 사용
+import threading
+import time
+from collections import OrderedDict
+
+# 기본 설정
+CACHE_TTL_SECONDS = 60
+CACHE_MAX_ENTRIES = 1024
+
+PRODUCT_KEY = 'products:item:{}:{}'
+PRODUCT_GENERATION_KEY = 'products:item:gen:{}'
+LIST_KEY = 'products:list:{}:{}'
+LIST_GENERATION_KEY = 'products:list:gen'
+
+
+class LocalCache:
+    '''프로세스 내부 TTL + LRU 캐시'''
+    def __init__(self, maxsize: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()   # key -> (만료시각, 값), 오래 안쓴 순서
+        self._counters = {}          # incr 용 카운터(세대 번호) - LRU 로 밀려나면 안되므로 따로 보관 (수정된 제품 수만큼)
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._counters:
+                return self._counters[key]
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)  # 최근 사용
+            return value
+
+    def set(self, key: str, value, ttl: float = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)  # 가장 오래 안쓴 항목 제거
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisCache:
+    '''Redis 호환 클라이언트를 감싼 백엔드 (get/set/delete/incr 만 사용)'''
+    def __init__(self, client, ttl: float = CACHE_TTL_SECONDS):
+        self.client = client
+        self.ttl = ttl
+
+    def get(self, key: str):
+        value = self.client.get(key)
+        if isinstance(value, bytes):
+            value = value.decode()
+        return value
+
+    def set(self, key: str, value, ttl: float = None):
+        self.client.set(key, value, ex=int(self.ttl if ttl is None else ttl))
+
+    def delete(self, key: str):
+        self.client.delete(key)
+
+    def incr(self, key: str) -> int:
+        return self.client.incr(key)
+
+
+class ProductCache:
+    '''제품 목록/상세 캐시 - 값은 직렬화된 JSON 문자열'''
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _count(self, value):
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def product_key(self, product_id: int) -> str:
+        '''상세 키 - DB 조회 전에 한번만 계산해서 get/set 에 같이 사용 (list_key 와 같은 방식)'''
+        generation = self.backend.get(PRODUCT_GENERATION_KEY.format(product_id)) or 0
+        return PRODUCT_KEY.format(product_id, generation)
+
+    def list_key(self, params: tuple) -> str:
+        '''목록 키 - DB 조회 전에 한번만 계산해서 get/set 에 같이 사용
+
+        조회 도중 쓰기가 일어나면 세대 번호가 바뀌므로 이전 세대 키에 저장되어 새 세대에서 보이지 않음
+        '''
+        generation = self.backend.get(LIST_GENERATION_KEY) or 0
+        return LIST_KEY.format(generation, params)
+
+    def get(self, key: str):
+        return self._count(self.backend.get(key))
+
+    def set(self, key: str, body: str):
+        self.backend.set(key, body)
+
+    def invalidate_list(self):
+        '''제품이 생성/수정/삭제되면 모든 목록 페이지 무효화'''
+        self.backend.incr(LIST_GENERATION_KEY)
+
+    def invalidate_product(self, product_id: int):
+        '''수정/삭제된 제품 상세 + 목록 무효화'''
+        self.backend.incr(PRODUCT_GENERATION_KEY.format(product_id))
+        self.invalidate_list()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'backend': type(self.backend).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+product_cache = ProductCache(LocalCache())
+
+
+def configure(backend):
+    '''캐시 백엔드 교체 - 앱 시작시 호출'''
+    product_cache.backend = backend
@@ -0,0 +1,149 @@
+"""
+제품 목록 필터/정렬 조합별 EXPLAIN QUERY PLAN 검사
+
+GET /api/products 가 만들 수 있는 조합의 SQLite 실행 계획을 확인
+  1) 필터 조합 (하나 이상) : products 를 인덱스로 검색(SEARCH ... USING INDEX)해야 함
+                             필터 하나만 쓰면 그 필터용 인덱스(FILTER_INDEXES)를 써야 함
+  2) 정렬키 (오름/내림)    : 정렬키 인덱스(ORDER_INDEXES) 순서대로 읽어서 별도 정렬(TEMP B-TREE)이 없어야 함
+                             인덱스 없는 SCAN products 는 id 정렬(기본키 순서)만 허용
+  3) 필터 + 정렬 + 커서     : 커서 조건까지 포함해서 인덱스로 검색해야 함
+인덱스가 빠지거나 사용되지 않으면 (SCAN products, 다른 인덱스, TEMP B-TREE) 실패
+새 DB (create_all) 와 저장소의 products.db 를 마이그레이션한 DB 두가지로 검사
+필터와 정렬을 함께 쓰는 offset 방식은 어느 인덱스를 쓸지(필터 vs 정렬) 데이터 분포에 따라
+SQLite 가 고르므로 검사하지 않음 - 운영 DB 에서는 ANALYZE 로 통계를 만들어 두면 됨
+
+인덱스나 필터를 바꾼 뒤 실행해서 풀 스캔이 생기지 않았는지 확인
+실행 : python check_query_plans.py   (실패하면 종료코드 1)
+"""
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime
+from sqlalchemy import select
+from database import build_engine
+from filters import apply_filters
+from pagination import SORT_COLUMNS, encode_cursor, keyset_statement, ordered_statement
+import migrations
+import models
+
+# 필터별 예시 값
+FILTER_VALUES = {
+    'price_min': 1000.0,
+    'price_max': 50000.0,
+    'in_stock': True,
+    'owner_id': 1,
+    'updated_since': datetime(2025, 1, 1),
+}
+ORDERS = list(SORT_COLUMNS) + [f'-{key}' for key in SORT_COLUMNS]
+# 필터 하나만 쓸 때 사용해야 하는 인덱스
+FILTER_INDEXES = {
+    'price_min': 'ix_products_price_id',
+    'price_max': 'ix_products_price_id',
+    'in_stock': 'ix_products_stock_id',
+    'owner_id': 'ix_products_owner_id_price',
+    'updated_since': 'ix_products_updated_at_id',
+}
+# 정렬키별 인덱스 - id 는 기본키(rowid) 순서로 읽음
+ORDER_INDEXES = {
+    'id': None,
+    'created_at': 'ix_products_created_at_id',
+    'updated_at': 'ix_products_updated_at_id',
+    'price': 'ix_products_price_id',
+    'stock': 'ix_products_stock_id',
+}
+# 저장소에 포함된 DB - 마이그레이션 후에도 같은 실행 계획이어야 함
+REPO_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'products.db')
+
+
+def query_plan(connection, stmt) -> list:
+    compiled = stmt.compile(dialect=connection.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}', params).all()
+    return [row[-1] for row in rows]
+
+
+def searches_index(plan:list) -> bool:
+    '''products 테이블을 인덱스로 검색하는지 (풀 스캔이 아닌지)'''
+    steps = [step for step in plan if ' products' in step]
+    return bool(steps) and all(step.startswith('SEARCH') and 'USING' in step for step in steps)
+
+
+def searches_with(index:str):
+    '''지정한 인덱스로 검색하는지'''
+    def check(plan:list) -> bool:
+        return searches_index(plan) and any(f'USING INDEX {index} ' in f'{step} ' for step in plan)
+    return check
+
+
+def reads_in_order(index):
+    '''별도 정렬 없이 정렬키 인덱스(None 이면 기본키) 순서대로 읽는지'''
+    def check(plan:list) -> bool:
+        if any('TEMP B-TREE' in step for step in plan):
+            return False
+        steps = [step for step in plan if ' products' in step]
+        if index is None:
+            return steps == ['SCAN products']
+        return len(steps) == 1 and f'USING INDEX {index}' in steps[0]
+    return check
+
+
+def filter_combinations():
+    for count in range(1, len(FILTER_VALUES) + 1):
+        for names in itertools.combinations(FILTER_VALUES, count):
+            yield '+'.join(names), apply_filters(
+                select(models.Product), **{name: FILTER_VALUES[name] for name in names}
+            )
+
+
+def checks():
+    '''(설명, select 문, 검사 함수)'''
+    for label, base in filter_combinations():
+        check = searches_with(FILTER_INDEXES[label]) if label in FILTER_INDEXES else searches_index
+        yield f'filter {label}', base, check
+    for order in ORDERS:
+        stmt = ordered_statement(select(models.Product), order).limit(100)
+        yield f'order={order}', stmt, reads_in_order(ORDER_INDEXES[order.lstrip('-')])
+    for label, base in filter_combinations():
+        for order in ORDERS:
+            values = [1 for _ in SORT_COLUMNS[order.lstrip('-')]]
+            stmt = keyset_statement(base, order, encode_cursor(order, values), 100)
+            yield f'filter {label} order={order} cursor', stmt, searches_index
+
+
+def check_database(label:str, path:str) -> tuple:
+    '''앱 시작과 같은 순서(create_all -> 마이그레이션)로 DB 를 준비하고 모든 조합 검사 -> (통과, 전체)'''
+    engine = build_engine(f'sqlite:///{path}', 'development')
+    models.Base.metadata.create_all(bind=engine)
+    migrations.upgrade(engine)
+
+    failures = 0
+    total = 0
+    with engine.connect() as connection:
+        for name, stmt, check in checks():
+            total += 1
+            plan = query_plan(connection, stmt)
+            if not check(plan):
+                failures += 1
+                print(f"[FAIL] {label}: {name}")
+                for step in plan:
+                    print(f"        {step}")
+    engine.dispose()
+    print(f"{label}: {total - failures}/{total} 조합 통과")
+    return total - failures, total
+
+
+def main():
+    tmpdir = tempfile.mkdtemp(prefix='check_plans_')
+    databases = [('new db', os.path.join(tmpdir, 'plans.db'))]
+    if os.path.exists(REPO_DB):
+        # 원본은 수정하지 않도록 복사본을 마이그레이션
+        databases.append(('migrated products.db', shutil.copy(REPO_DB, os.path.join(tmpdir, 'products.db'))))
+    results = [check_database(label, path) for label, path in databases]
+    shutil.rmtree(tmpdir, ignore_errors=True)
+    return 0 if all(passed == total for passed, total in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+# 응답 압축 미들웨어 (gzip / brotli)
+# 제품 목록/내보내기 JSON 은 반복되는 키가 많아서 압축률이 높음 (보통 1/5 ~ 1/10)
+# Django 서버와 WAN 으로 연결되어 있으므로 전송량을 줄이는 효과가 큼
+#
+#   - 협상 : Accept-Encoding 의 q 값을 보고 지원하는 인코딩 중 가장 선호하는 것을 선택
+#            같은 q 값이면 COMPRESSION_ENCODINGS 순서 (brotli 가 gzip 보다 작음)
+#   - 최소 크기 : COMPRESSION_MINIMUM_SIZE 보다 작은 응답은 압축 이득보다 CPU 비용이 크므로 그대로 전송
+#   - 스트리밍 : StreamingResponse(내보내기)는 청크마다 압축 후 flush 해서 바로 전송
+#                전체 본문을 모으지 않으므로 메모리 사용량이 그대로 일정
+#   - 대상 : JSON / NDJSON / CSV / text 만 (이미 압축된 형식은 제외)
+#   - ETag 는 그대로 유지 (Starlette GZipMiddleware 와 같은 방식) - 조건부 요청(etag.py)이 인코딩과 무관하게 동작
+#
+# brotli 패키지는 requirements.txt 에 포함 - 설치되어 있지 않으면 br 은 제외하고 gzip 만 사용
+#   /api/compression/stats 의 available 로 실제로 협상하는 인코딩 확인
+# 통계 : GET /api/compression/stats
+import os
+import zlib
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MINIMUM_SIZE = int(os.getenv('COMPRESSION_MINIMUM_SIZE', 1024))   # bytes
+COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', 6))           # 1(빠름) ~ 9(작음)
+COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 4))   # 0 ~ 11, 4 이하가 gzip 수준 속도
+COMPRESSION_ENCODINGS = os.getenv('COMPRESSION_ENCODINGS', 'br,gzip')         # 사용할 인코딩, 선호 순서
+
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/x-ndjson',
+    'text/',
+)
+
+
+class _GzipEncoder:
+    def __init__(self, level: int):
+        # wbits=31 : gzip 헤더/트레일러 포함
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        '''지금까지의 데이터를 클라이언트가 풀 수 있도록 내보냄 (스트림은 계속)'''
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class CompressionStats:
+    '''인코딩별 압축 전/후 바이트 수'''
+    def __init__(self):
+        self.available = []   # 미들웨어가 협상하는 인코딩 (brotli 미설치면 br 없음) - reset 대상 아님
+        self.reset()
+
+    def reset(self):
+        self.responses = {}
+        self.bytes_in = {}
+        self.bytes_out = {}
+        self.skipped = 0   # 압축 가능한 클라이언트였지만 최소 크기 미만/대상 형식이 아니라서 그대로 보낸 응답
+
+    def record(self, encoding: str, size_in: int, size_out: int):
+        self.responses[encoding] = self.responses.get(encoding, 0) + 1
+        self.bytes_in[encoding] = self.bytes_in.get(encoding, 0) + size_in
+        self.bytes_out[encoding] = self.bytes_out.get(encoding, 0) + size_out
+
+    def snapshot(self) -> dict:
+        total_in = sum(self.bytes_in.values())
+        total_out = sum(self.bytes_out.values())
+        return {
+            'available': self.available,
+            'encodings': {
+                encoding: {
+                    'responses': self.responses[encoding],
+                    'bytes_in': self.bytes_in[encoding],
+                    'bytes_out': self.bytes_out[encoding],
+                }
+                for encoding in self.responses
+            },
+            'skipped': self.skipped,
+            'bytes_saved': total_in - total_out,
+            'ratio': round(total_out / total_in, 4) if total_in else 0.0,
+        }
+
+
+compression_stats = CompressionStats()
+
+
+def parse_accept_encoding(header: str) -> dict:
+    '''Accept-Encoding -> {인코딩: q}   ex) "br;q=1.0, gzip;q=0.8" -> {'br': 1.0, 'gzip': 0.8}'''
+    accepted = {}
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def choose_encoding(header: str, encodings: list):
+    '''클라이언트가 받을 수 있는 인코딩 중 가장 선호하는 것 - 없으면 None'''
+    accepted = parse_accept_encoding(header)
+    best, best_q = None, 0.0
+    for encoding in encodings:
+        q = accepted.get(encoding, accepted.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressionMiddleware:
+    '''ASGI 응답 압축 미들웨어
+
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    '''
+    def __init__(
+        self,
+        app,
+        minimum_size: int = COMPRESSION_MINIMUM_SIZE,
+        gzip_level: int = COMPRESSION_GZIP_LEVEL,
+        brotli_quality: int = COMPRESSION_BROTLI_QUALITY,
+        encodings: str = COMPRESSION_ENCODINGS,
+        stats: CompressionStats = compression_stats,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.stats = stats
+        names = [name.strip() for name in encodings.split(',') if name.strip()]
+        # brotli 패키지가 없으면 br 은 제외
+        self.encodings = [name for name in names if name == 'gzip' or (name == 'br' and brotli is not None)]
+        self.stats.available = list(self.encodings)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get('accept-encoding', ''), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponder(self, encoding)(self.app, scope, receive, send)
+
+    def encoder(self, encoding: str):
+        if encoding == 'br':
+            return _BrotliEncoder(self.brotli_quality)
+        return _GzipEncoder(self.gzip_level)
+
+
+class _CompressedResponder:
+    '''요청 하나의 응답 메시지를 가로채서 압축'''
+    def __init__(self, middleware: CompressionMiddleware, encoding: str):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = None
+        self.start_message = None
+        self.encoder = None       # None 이면 압축하지 않고 통과
+        self.started = False      # response.start 를 보냈는지
+        self.size_in = 0
+        self.size_out = 0
+
+    async def __call__(self, app, scope, receive, send):
+        self.send = send
+        await app(scope, receive, self.send_wrapper)
+
+    def _compressible(self, headers: Headers) -> bool:
+        if self.start_message['status'] in (204, 304) or 'content-encoding' in headers:
+            return False
+        content_type = headers.get('content-type', '')
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    async def send_wrapper(self, message):
+        if message['type'] == 'http.response.start':
+            # 첫 본문을 보고 압축 여부를 정해야 하므로 보류
+            self.start_message = message
+            return
+        if message['type'] != 'http.response.body':
+            await self.send(message)
+            return
+
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+
+        if not self.started:
+            self.started = True
+            headers = Headers(raw=self.start_message['headers'])
+            if not self._compressible(headers) or (not more_body and len(body) < self.middleware.minimum_size):
+                self.middleware.stats.skipped += 1
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+            self.encoder = self.middleware.encoder(self.encoding)
+            compressed = self._compress(body, more_body)
+            headers = MutableHeaders(raw=self.start_message['headers'])
+            headers['Content-Encoding'] = self.encoding
+            headers.add_vary_header('Accept-Encoding')
+            if more_body:
+                # 스트리밍 - 전체 길이를 미리 알 수 없음 (chunked 전송)
+                if 'content-length' in headers:
+                    del headers['content-length']
+            else:
+                headers['Content-Length'] = str(len(compressed))
+            await self.send(self.start_message)
+            await self.send({'type': 'http.response.body', 'body': compressed, 'more_body': more_body})
+        elif self.encoder is None:
+            await self.send(message)
+            return
+        else:
+            compressed = self._compress(body, more_body)
+            await self.send({'type': 'http.response.body', 'body': compressed, 'more_body': more_body})
+
+        if not more_body:
+            self.middleware.stats.record(self.encoding, self.size_in, self.size_out)
+
+    def _compress(self, body: bytes, more_body: bool) -> bytes:
+        data = self.encoder.compress(body)
+        # 스트리밍 중에는 청크마다 flush 해서 클라이언트가 바로 받을 수 있게 함
+        data += self.encoder.flush() if more_body else self.encoder.finish()
+        self.size_in += len(body)
+        self.size_out += len(data)
+        return data
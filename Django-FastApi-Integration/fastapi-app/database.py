@@ -1,21 +1,89 @@
 # DB 연결정보 정의
 # SQLAlchemy Engine 생성
 # 세션 생성 안전한 종료 관리
-from sqlalchemy import create_engine 
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from contextlib import contextmanager   # with문으로 DB 세션을 쓰기위한 
+import os
+import time
+import metrics
 
 # 데이터 베이스 url 설정
 SQLALCHEMY_DATABASE_URL = 'sqlite:///./products.db'
+# 비동기 드라이버 url - 같은 DB 파일을 aiosqlite 로 접근
+# PostgreSQL 로 바꿀 때는 환경변수로 교체  postgresql+asyncpg://user:pw@host/db
+ASYNC_SQLALCHEMY_DATABASE_URL = os.getenv('ASYNC_DATABASE_URL', 'sqlite+aiosqlite:///./products.db')
+
+# DB 설정 프로필 - 환경변수 DB_PROFILE 로 선택 (development | production)
+# development : SQLite 기본값 (rollback journal) - 쓰기 중에는 읽기도 막힘
+# production  : WAL 모드 + pragma 튜닝 + 커넥션 풀 크기 지정
+DB_PROFILE = os.getenv('DB_PROFILE', 'development')
+
+DB_PROFILES = {
+    'development': {
+        'pragmas': {},
+        'pool': {},
+    },
+    'production': {
+        # 커넥션이 새로 만들어질 때마다 실행 (pragma 는 커넥션 단위 설정)
+        'pragmas': {
+            'journal_mode': 'WAL',      # 읽기와 쓰기가 서로 막지 않음, 쓰기는 여전히 한번에 하나
+            'synchronous': 'NORMAL',    # WAL 에서는 체크포인트 때만 fsync - 커밋마다 fsync 하지 않음
+            'mmap_size': 268435456,     # 256MB 까지 메모리 맵으로 읽기 (read 시스템콜 감소)
+            'cache_size': -65536,       # 커넥션당 페이지 캐시 64MB (음수는 KiB 단위)
+            'busy_timeout': 5000,       # 잠금이 풀릴 때까지 5초 대기 후 database is locked
+            'temp_store': 'MEMORY',     # 정렬/임시 테이블을 메모리에서 처리
+        },
+        # 동시 요청 수에 맞춘 풀 크기 - 풀이 작으면 커넥션을 기다리느라 지연 발생
+        'pool': {
+            'pool_size': 10,
+            'max_overflow': 20,
+            'pool_timeout': 30,
+            'pool_recycle': 3600,
+        },
+    },
+}
+
+
+def apply_sqlite_pragmas(sync_engine, pragmas:dict):
+    '''엔진이 커넥션을 만들 때마다 pragma 적용'''
+    @event.listens_for(sync_engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
 
 
 # sqllite 는 기본적으로 단일 스레드 제한
 # sqllite + fastapi 조합시 다중 스레드 문제 발생
 # 이를 해결하기 위한 옵션 추가
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False}  # SQLite 특정 옵션
-)
+def build_engine(url:str=SQLALCHEMY_DATABASE_URL, profile:str=DB_PROFILE):
+    '''프로필 설정을 적용한 동기 엔진 생성'''
+    settings = DB_PROFILES[profile]
+    is_sqlite = url.startswith('sqlite')
+    sync_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False} if is_sqlite else {},  # SQLite 특정 옵션
+        **settings['pool']
+    )
+    if is_sqlite and settings['pragmas']:
+        apply_sqlite_pragmas(sync_engine, settings['pragmas'])
+    return sync_engine
+
+
+def build_async_engine(url:str=ASYNC_SQLALCHEMY_DATABASE_URL, profile:str=DB_PROFILE):
+    '''프로필 설정을 적용한 비동기 엔진 생성'''
+    settings = DB_PROFILES[profile]
+    new_engine = create_async_engine(url, **settings['pool'])
+    if url.startswith('sqlite') and settings['pragmas']:
+        # 이벤트는 내부 동기 엔진에 등록
+        apply_sqlite_pragmas(new_engine.sync_engine, settings['pragmas'])
+    return new_engine
+
+
+engine = build_engine()
 
 # 트랜잭션 제어 
 # 애외 발생시 롤백관리
@@ -27,12 +95,14 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 #     products = db.query(models.Product).all()
 #     return products
 def get_db():
+    started = time.perf_counter()
     db = SessionLocal()
     # return db
     try:
         yield db   # 빌려주고 회수의 개념
     finally:
         db.close()
+        metrics.observe_session('sync', started)   # 세션 사용 시간 (/metrics)
 
 # 파이썬이 관리하는 방식, 데이터를 스크립트로 초기화 하거나 기타 테스트코드 적용시 사용
 @contextmanager
@@ -41,4 +111,28 @@ def get_db_context():
     try:
         yield db
     finally:
-        db.close()        
\ No newline at end of file
+        db.close()
+
+
+# 비동기 엔진/세션
+# async 라우터에서 사용 - DB 응답을 기다리는 동안 이벤트 루프가 다른 요청을 처리하므로
+# 스레드풀 크기에 묶이지 않고 워커 하나가 많은 동시 요청을 처리
+async_engine = build_async_engine()
+
+# 요청별 SQL 문 수 집계 (/metrics)
+metrics.instrument_engine(engine)
+metrics.instrument_engine(async_engine.sync_engine)
+
+# expire_on_commit=False : commit 후 속성에 접근할 때 다시 SELECT(비동기에서는 불가) 하지 않도록
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# async def test(db:AsyncSession=Depends(get_async_db)):
+#     result = await db.execute(select(models.Product))
+#     products = result.scalars().all()
+async def get_async_db():
+    started = time.perf_counter()
+    try:
+        async with AsyncSessionLocal() as db:
+            yield db
+    finally:
+        metrics.observe_session('async', started)   # 세션 사용 시간 (/metrics)
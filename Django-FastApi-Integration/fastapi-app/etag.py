@@ -0,0 +1,80 @@
+# ETag / 조건부 GET (If-None-Match -> 304)
+# 클라이언트가 이전 응답의 ETag 를 보내고 내용이 그대로면 본문 없이 304 만 반환
+# 네트워크 전송과 클라이언트의 JSON 파싱을 건너뛸 수 있음
+#
+# strong ETag
+#   - 상세 : 행 버전(Product.version)  ex) "v3"
+#            수정할 때마다 1 씩 증가하므로 같은 초에 두번 수정되어도 구분됨 (updated_at 은 초 단위)
+#            PUT 의 If-Match 로 그대로 돌려받아 조건부 UPDATE 에 사용 (낙관적 동시성 제어)
+#   - 목록 : 페이지 본문 전체의 해시가 곧 목록(컬렉션) 버전 - 추가/삭제/수정 중 하나라도 있으면 바뀜
+#   같은 내용이면 워커/캐시 백엔드와 상관없이 항상 같은 값
+import hashlib
+import re
+from typing import Optional, Union
+from fastapi import Request, Response
+
+# 캐시된 상세 본문(schemas.Product JSON)에서 버전을 꺼낼 때 사용 - 본문 전체를 파싱하지 않음
+_BODY_VERSION = re.compile(r'"version":(\d+)')
+_VERSION_ETAG = re.compile(r'^"v(\d+)"$')   # If-Match 는 strong 비교 - W/ 는 일치하지 않음
+
+# If-Match: * - 버전과 상관없이 존재하기만 하면 됨 (parse_if_match 반환값, == 로 비교)
+WILDCARD = '*'
+
+
+def make_etag(body: str) -> str:
+    '''응답 본문 -> strong ETag (따옴표 포함)'''
+    return '"' + hashlib.blake2b(body.encode(), digest_size=16).hexdigest() + '"'
+
+
+def version_etag(version: int) -> str:
+    '''행 버전 -> ETag'''
+    return f'"v{version}"'
+
+
+def body_version_etag(body: str) -> str:
+    '''직렬화된 제품 상세 본문 -> 행 버전 ETag'''
+    return version_etag(int(_BODY_VERSION.search(body).group(1)))
+
+
+def parse_if_match(if_match: str) -> Union[int, str, None]:
+    '''If-Match 헤더 -> 기대하는 행 버전
+
+    '*' 는 WILDCARD, 버전 ETag 가 아니면 None ("v0" 은 버전 0 - 어떤 행과도 일치하지 않음)
+    '''
+    if_match = if_match.strip()
+    if if_match == WILDCARD:
+        return WILDCARD
+    matched = _VERSION_ETAG.match(if_match)
+    return int(matched.group(1)) if matched else None
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    '''If-None-Match 헤더에 etag 가 있는지
+
+    여러 값(콤마 구분), '*', 약한 비교(W/ 접두어 무시) 처리
+    '''
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def conditional_response(request: Request, body: str, etag: Optional[str] = None) -> Response:
+    '''직렬화된 JSON 에 ETag 를 붙여 반환 - If-None-Match 가 일치하면 본문 없는 304
+
+    etag 를 생략하면 본문 해시를 사용
+    '''
+    if etag is None:
+        etag = make_etag(body)
+    # no-cache : 저장은 하되 쓰기 전에 항상 ETag 로 재검증
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if etag_matches(request.headers.get('if-none-match', ''), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type='application/json', headers=headers)
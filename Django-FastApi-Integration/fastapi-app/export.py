@@ -0,0 +1,69 @@
+# 전체 제품 카탈로그 스트리밍 내보내기 (NDJSON / CSV)
+# .all() 로 전부 메모리에 올리고 Pydantic 으로 검증한 뒤 큰 JSON 배열 하나를 만드는 대신
+# 서버측 커서에서 yield_per 단위로 읽어서 바로 응답으로 흘려보냄 -> 카탈로그 크기와 상관없이 메모리 일정
+#
+# 주의 : yield 의존성(get_async_db)은 응답 본문을 보내기 전에 종료되므로
+#        스트리밍 제너레이터 안에서 직접 세션을 열고 닫음
+import csv
+import io
+import json
+from datetime import datetime
+from sqlalchemy import select
+from database import AsyncSessionLocal
+import models
+
+EXPORT_BATCH_SIZE = 1000   # 한번에 DB 에서 가져오고 응답으로 내보내는 행 수
+
+# schemas.Product 와 같은 필드 - ORM 객체 대신 컬럼 튜플로 조회해서 객체 생성 비용 제거
+EXPORT_COLUMNS = [
+    models.Product.id,
+    models.Product.name,
+    models.Product.description,
+    models.Product.price,
+    models.Product.stock,
+    models.Product.version,
+    models.Product.created_at,
+    models.Product.updated_at,
+]
+EXPORT_FIELDS = [c.key for c in EXPORT_COLUMNS]
+
+EXPORT_MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def _value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _ndjson_chunk(rows) -> str:
+    return ''.join(
+        json.dumps(dict(zip(EXPORT_FIELDS, map(_value, row))), ensure_ascii=False) + '\n'
+        for row in rows
+    )
+
+
+def _csv_chunk(rows) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([[_value(v) for v in row] for row in rows])
+    return buffer.getvalue()
+
+
+async def iter_products(fmt:str):
+    '''내보내기 본문을 EXPORT_BATCH_SIZE 행 단위 문자열로 생성'''
+    if fmt == 'csv':
+        yield _csv_chunk([EXPORT_FIELDS])   # 헤더
+        to_chunk = _csv_chunk
+    else:
+        to_chunk = _ndjson_chunk
+    stmt = (
+        select(*EXPORT_COLUMNS)
+        .order_by(models.Product.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt)   # 서버측 커서
+        async for rows in result.partitions():
+            yield to_chunk(rows)
@@ -0,0 +1,36 @@
+# 제품 목록 필터
+# 각 조건은 models.Product 의 인덱스로 검색됨 (check_query_plans.py 로 확인)
+#   price_min / price_max : ix_products_price_id      (price, id)
+#   in_stock              : ix_products_stock_id      (stock, id)
+#   owner_id              : ix_products_owner_id_price (owner_id, price)
+#   updated_since         : ix_products_updated_at_id  (updated_at, id)
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import String, type_coerce
+from pagination import format_timestamp
+import models
+
+
+def apply_filters(
+    stmt,
+    price_min:Optional[float] = None,
+    price_max:Optional[float] = None,
+    in_stock:Optional[bool] = None,
+    owner_id:Optional[int] = None,
+    updated_since:Optional[datetime] = None,
+):
+    '''select 문에 전달된 필터만 WHERE 조건으로 추가'''
+    if price_min is not None:
+        stmt = stmt.where(models.Product.price >= price_min)
+    if price_max is not None:
+        stmt = stmt.where(models.Product.price <= price_max)
+    if in_stock is True:
+        stmt = stmt.where(models.Product.stock > 0)
+    elif in_stock is False:
+        stmt = stmt.where(models.Product.stock <= 0)
+    if owner_id is not None:
+        stmt = stmt.where(models.Product.owner_id == owner_id)
+    if updated_since is not None:
+        # 저장 형식 문자열로 비교 (DateTime 바인딩은 마이크로초가 붙어서 같은 초의 행이 빠짐)
+        stmt = stmt.where(models.Product.updated_at >= type_coerce(format_timestamp(updated_since), String))
+    return stmt
@@ -1,27 +1,51 @@
-from fastapi import FastAPI,Depends,HTTPException,status
+from fastapi import FastAPI,Depends,HTTPException,status,Response,Request,Header
 from fastapi.middleware.cors import CORSMiddleware   #  Django(8000) 와 FastAPI(8001) 연동시 필요  CORS 문제 해결
-from sqlalchemy.orm import Session 
-from typing import List
+from fastapi.responses import StreamingResponse, ORJSONResponse
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import select, insert, update, delete, or_
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
+from datetime import datetime, timedelta
 import models
 import schemas
-from database import engine, get_db
+from database import engine, async_engine, get_async_db
+from pagination import keyset_statement, ordered_statement, split_page
+from cache import product_cache
+import bulk
+from export import iter_products, EXPORT_MEDIA_TYPES
+from search import build_match_query, search_statement
+from filters import apply_filters
+from compression import CompressionMiddleware, compression_stats
+import metrics
+import sqltrace
+from ratelimit import rate_limit
+from serializers import product_rows, dump_products, dump_product_page
+from etag import conditional_response, body_version_etag, version_etag, parse_if_match, WILDCARD
+import migrations
 from auth import (
     authenticate_user,
     create_access_token,
-    get_current_user,
-    get_password_hash,
+    get_current_active_user,
+    get_password_hash_async,
     check_permission,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
 
-# 테이블 생성
+# 테이블 생성 - 시작시 한번이므로 동기 엔진 사용
 models.Base.metadata.create_all(bind=engine)
+# 기존 DB 에 추가된 인덱스/검색 테이블 반영
+migrations.upgrade(engine)
+
+# 커서 모드 한 페이지 최대 크기
+MAX_PAGE_SIZE = 1000
 
 
 app = FastAPI(
     title="Product API",
     description='제품관리',
-    version='1.0.0'
+    version='1.0.0',
+    default_response_class=ORJSONResponse   # 응답 JSON 을 표준 json 대신 orjson 으로 생성
 )
 
 # CROS 설정 - Django 와 FastAPI 연동시 필요
@@ -32,9 +56,19 @@ app.add_middleware(
     allow_methods=["*"], # 모든 메서드 허용  GET POST PUT DELETE
     allow_headers=["*"], # 모든 헤더 허용 Authorization, Content-Type ...
 )
+# 응답 압축 - gzip/brotli, 설정은 compression.py 의 환경변수 참고
+app.add_middleware(CompressionMiddleware)
+# 요청별 SQL 기록/N+1 탐지 - 개발/스테이징에서만 (SQL_TRACE=1)
+if sqltrace.SQL_TRACE_ENABLED:
+    sqltrace.instrument_engine(engine)
+    sqltrace.instrument_engine(async_engine.sync_engine)
+    app.add_middleware(sqltrace.SQLTraceMiddleware)
+# 요청 메트릭 - 가장 바깥에 두어서 압축까지 포함한 전체 시간 측정
+app.add_middleware(metrics.MetricsMiddleware)
 
 
 # 라우터 설정
+# 각 라우트의 dependencies=[Depends(rate_limit(...))] 는 요청 속도 제한 - 초과하면 429 (ratelimit.py)
 @app.get('/')
 def root():
     return {
@@ -42,104 +76,343 @@ def root():
         'docs': '/docs',
         'endpoints' : {
             'products' : '/api/products',
+            'products_cursor' : '/api/products?cursor=',
             'product':'/api/products/{id}',
+            'products_bulk':'/api/products/bulk',
+            'products_export':'/api/products/export?format=ndjson|csv',
+            'products_search':'/api/products/search?q=',
             'register':'/api/auth/register',
             'login':'/api/auth/token',
-            'me':'/api/auth/me'
+            'me':'/api/auth/me',
+            'cache_stats':'/api/cache/stats',
+            'compression_stats':'/api/compression/stats',
+            'metrics':'/metrics'
         }
     }
 # 인증관련
-@app.post('/api/auth/register',response_model=schemas.User,status_code=status.HTTP_201_CREATED)
-def register_user(user:schemas.UserCreate, db:Session=Depends(get_db)):
+# 모든 라우터는 async def + AsyncSession
+    # DB 응답/해싱을 기다리는 동안 이벤트 루프가 다른 요청을 처리 (스레드풀을 사용하지 않음)
+@app.post('/api/auth/register',response_model=schemas.User,status_code=status.HTTP_201_CREATED,dependencies=[Depends(rate_limit('register'))])
+async def register_user(user:schemas.UserCreate, db:AsyncSession=Depends(get_async_db)):
     '''사용자 등록'''
-    # 중복체크
-    db_user = db.query(models.User).filter(models.User.username == user.username).first()
-    if db_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Username {user.username} is already registered"
-        )
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
-    if db_user:
+    # 중복체크 - username, email 을 한번에 조회 (중복이면 비싼 해싱을 하지 않음)
+    result = await db.execute(
+        select(models.User.username, models.User.email)
+        .where(or_(models.User.username == user.username, models.User.email == user.email))
+    )
+    for username, email in result.all():
+        if username == user.username:
+            raise duplicate_user_exception(f"Username {user.username}")
+        raise duplicate_user_exception(f"email {user.email}")
+    # 사용자 생성 - INSERT ... RETURNING 으로 생성된 행을 바로 받음 (commit 후 refresh SELECT 없음)
+    hashed_password =  await get_password_hash_async(user.password)
+    try:
+        db_user = (await db.scalars(
+            insert(models.User).values(
+                username = user.username,
+                email = user.email,
+                full_name = user.full_name,
+                hashed_password = hashed_password,
+                role = user.role
+            ).returning(models.User)
+        )).one()
+        await db.commit()
+    except IntegrityError as e:
+        # 중복체크와 INSERT 사이에 같은 값이 먼저 등록된 경우
+        await db.rollback()
+        if 'email' in str(e.orig):
+            raise duplicate_user_exception(f"email {user.email}")
+        raise duplicate_user_exception(f"Username {user.username}")
+    return db_user
+
+def duplicate_user_exception(what:str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"{what} is already registered"
+    )
+
+# 로그인 - form 데이터(username, password)로 토큰 발급
+@app.post('/api/auth/token',response_model=schemas.Token,dependencies=[Depends(rate_limit('login'))])
+async def login(form_data:OAuth2PasswordRequestForm=Depends(), db:AsyncSession=Depends(get_async_db)):
+    '''액세스 토큰 발급'''
+    user = await authenticate_user(db, form_data.username, form_data.password)
+    if not user:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"email {user.email} is already registered"
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password",
+            headers={"WWW-Authenticate": "Bearer"},
         )
-    # 사용자 생성
-    hashed_password =  get_password_hash(user.password)
-    db_user =  models.User(
-        username = user.username,
-        email = user.email,
-        full_name = user.full_name,
-        hashed_password = hashed_password,
-        role = user.role    
+    access_token = create_access_token(
+        data={'sub': user.username},
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    return {'access_token': access_token, 'token_type': 'bearer'}
+
+# 현재 로그인한 사용자 정보
+@app.get('/api/auth/me',response_model=schemas.User)
+async def read_me(current_user:models.User=Depends(get_current_active_user)):
+    return current_user
 
 # 제품 목록 조회
 #response_model 
     # 반환데이터 자동검증
     # ORM 모델 -> JSON 변환
     # Swagger 문서 자동생성
-@app.get("/api/products",response_model=List[schemas.Product])
-def get_products(
+# 커서 페이지네이션
+    # cursor 를 생략하면 기존 skip/limit 방식(레거시) - 목록만 반환
+    # cursor 를 주면 키셋 방식 - {items, next_cursor} 반환, 첫 페이지는 빈 값 (?cursor=)
+# 정렬 order : id | created_at | updated_at | price | stock, 앞에 '-' 는 내림차순  ex) order=-price
+# 필터 (모두 인덱스 사용)
+    # price_min, price_max : 가격 범위
+    # in_stock=true : 재고 있는 제품만
+    # owner_id : 소유자
+    # updated_since : 이 시각 이후 수정된 제품 (ISO 8601)
+# 응답에 ETag 포함 - If-None-Match 가 같으면 304 (etag.py 참고)
+@app.get("/api/products",response_model=Union[List[schemas.Product], schemas.ProductPage],dependencies=[Depends(rate_limit('products'))])
+async def get_products(
+    request:Request,
     skip:int = 0,
     limit:int = 100,
-    db:Session=Depends(get_db)  # 함수실행이 끝나면 DB 세션 자동 종료
+    cursor:Optional[str] = None,
+    order:str = 'id',
+    price_min:Optional[float] = None,
+    price_max:Optional[float] = None,
+    in_stock:Optional[bool] = None,
+    owner_id:Optional[int] = None,
+    updated_since:Optional[datetime] = None,
+    db:AsyncSession=Depends(get_async_db)  # 함수실행이 끝나면 DB 세션 자동 종료
+):
+    filters = dict(
+        price_min=price_min, price_max=price_max, in_stock=in_stock,
+        owner_id=owner_id, updated_since=updated_since,
+    )
+    # 캐시 확인 (read-through) - 없으면 DB 조회 후 직렬화 결과를 저장
+    cache_key = product_cache.list_key((skip, limit, cursor, order, tuple(filters.values())))
+    body = product_cache.get(cache_key)
+    if body is not None:
+        return conditional_response(request, body)
+    # ORM 객체 대신 컬럼 튜플로 조회해서 바로 직렬화 (serializers.py)
+    stmt = apply_filters(product_rows(), **filters)
+    if cursor is None:
+        try:
+            stmt = ordered_statement(stmt, order)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        result = await db.execute(stmt.offset(skip).limit(limit))
+        body = dump_products(result.all())
+    else:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        try:
+            stmt = keyset_statement(stmt, order, cursor, limit)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        result = await db.execute(stmt)
+        items, next_cursor = split_page(result.all(), order, limit)
+        body = dump_product_page(items, next_cursor)
+    product_cache.set(cache_key, body)
+    return conditional_response(request, body)
+
+# 대량 처리 - /api/products/{product_id} 보다 먼저 등록해야 'bulk' 가 id 로 해석되지 않음
+# 본문 : JSON 배열 또는 NDJSON (Content-Type: application/x-ndjson)
+# 요청 전체를 하나의 트랜잭션으로 처리하고 항목별 결과를 반환
+    # 잘못된 항목은 건너뜀 (invalid / not_found)
+    # DB 오류가 나면 전체 롤백
+async def run_bulk(request:Request, db:AsyncSession, schema, operation, *args) -> schemas.BulkResult:
+    try:
+        items = bulk.parse_items(await request.body(), request.headers.get('content-type', ''))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    valid, failed = bulk.validate_items(items, schema)
+    try:
+        done = await operation(db, valid, *args)
+        await db.commit()   # 전체를 한번에 commit
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Bulk operation failed, nothing was applied: {e.__class__.__name__}"
+        )
+    for result in done:
+        if result.status in ('updated', 'deleted'):
+            product_cache.invalidate_product(result.id)
+    product_cache.invalidate_list()
+    return bulk.summarize(failed + done)
+
+# 대량 생성 - 생성되는 제품의 소유자가 필요하므로 로그인 필요
+@app.post("/api/products/bulk",response_model=schemas.BulkResult,dependencies=[Depends(rate_limit('writes'))])
+async def bulk_create_products(
+    request:Request,
+    db:AsyncSession=Depends(get_async_db),
+    current_user:models.User=Depends(get_current_active_user)
+):
+    return await run_bulk(request, db, schemas.ProductCreate, bulk.bulk_create, current_user.id)
+
+# 대량 수정 - [{"id": 1, "price": 1000}, ...]
+@app.put("/api/products/bulk",response_model=schemas.BulkResult,dependencies=[Depends(rate_limit('writes'))])
+async def bulk_update_products(
+    request:Request,
+    db:AsyncSession=Depends(get_async_db),
+    current_user:models.User=Depends(get_current_active_user)
 ):
-    products = db.query(models.Product).offset(skip).limit(limit).all()
-    return products
+    return await run_bulk(request, db, schemas.ProductBulkUpdate, bulk.bulk_update)
 
-# 제품 상세 조회
-@app.get("/api/products/{product_id}",response_model=schemas.Product)
-def get_product(product_id:int, db:Session=Depends(get_db)):
-    product = db.query(models.Product).filter(models.Product.id == product_id).first()
+# 대량 삭제 - [1, 2, 3] 또는 [{"id": 1}, ...]
+@app.delete("/api/products/bulk",response_model=schemas.BulkResult,dependencies=[Depends(rate_limit('writes'))])
+async def bulk_delete_products(
+    request:Request,
+    db:AsyncSession=Depends(get_async_db),
+    current_user:models.User=Depends(get_current_active_user)
+):
+    return await run_bulk(request, db, schemas.ProductBulkDelete, bulk.bulk_delete)
+
+# 전체 카탈로그 내보내기 - NDJSON(기본) 또는 CSV 를 스트리밍
+# limit 없이 전체를 내보내지만 메모리 사용량은 일정 (export.py 참고)
+@app.get("/api/products/export",dependencies=[Depends(rate_limit('export'))])
+async def export_products(format:str='ndjson'):
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported format '{format}' (ndjson | csv)"
+        )
+    return StreamingResponse(
+        iter_products(format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={'Content-Disposition': f'attachment; filename="products.{format}"'}
+    )
+
+# 제품 검색 - 이름/설명 전문 검색, 관련도 순
+    # q : 검색어 (단어마다 접두어 검색, 모든 단어 포함)  ex) ?q=무선 마우
+@app.get("/api/products/search",response_model=List[schemas.Product],dependencies=[Depends(rate_limit('products'))])
+async def search_products(
+    q:str,
+    skip:int = 0,
+    limit:int = 20,
+    db:AsyncSession=Depends(get_async_db)
+):
+    match = build_match_query(q)
+    if not match:
+        return []
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    result = await db.execute(search_statement(match, skip, limit, product_rows()))
+    return Response(content=dump_products(result.all()), media_type='application/json')
+
+# 제품 상세 조회 - 응답에 ETag(행 버전) 포함, If-None-Match 가 같으면 304
+@app.get("/api/products/{product_id}",response_model=schemas.Product,dependencies=[Depends(rate_limit('products'))])
+async def get_product(product_id:int, request:Request, db:AsyncSession=Depends(get_async_db)):
+    cache_key = product_cache.product_key(product_id)
+    body = product_cache.get(cache_key)
+    if body is not None:
+        return conditional_response(request, body, body_version_etag(body))
+    product = await db.get(models.Product, product_id)
     if product is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Product not found with id {product_id}"
         )
-    return product
+    body = schemas.Product.model_validate(product, from_attributes=True).model_dump_json()
+    product_cache.set(cache_key, body)
+    return conditional_response(request, body, version_etag(product.version))
 
-# 제품생성
+# 제품생성 - 로그인 없이 생성 (Django 화면에서 호출), 소유자(owner_id)는 비워둠
 # 성공하면 HTTP_201_CREATED  상태 코드
-@app.post("/api/products",response_model=schemas.Product,status_code=status.HTTP_201_CREATED)
-def create_product(product:schemas.ProductCreate, db:Session=Depends(get_db)):
-    db_product = models.Product(**product.model_dump())
-    # db에 저장
-    db.add(db_product)  # db 세션에 저장
-    db.commit()   # 실제 db에 insert
-    db.refresh(db_product)  # 방금 저장된 데이터를 다시 조회
+@app.post("/api/products",response_model=schemas.Product,status_code=status.HTTP_201_CREATED,dependencies=[Depends(rate_limit('writes'))])
+async def create_product(product:schemas.ProductCreate, db:AsyncSession=Depends(get_async_db)):
+    # INSERT ... RETURNING - id, created_at 등 DB 가 채운 값까지 한 문장으로 받음
+    db_product = (await db.scalars(
+        insert(models.Product).values(**product.model_dump()).returning(models.Product)
+    )).one()
+    await db.commit()   # 실제 db에 반영
+    product_cache.invalidate_list()  # 목록 페이지 구성이 바뀜
     return db_product
 
-# 제품 수정
-@app.put("/api/products/{product_id}",response_model=schemas.Product)
-def update_product(product_id:int, product:schemas.ProductUpdate,db:Session=Depends(get_db)):
-    db_product = db.query(models.Product).filter(models.Product.id == product_id).first()
-    if db_product is None:
+# 제품 수정 - 낙관적 동시성 제어
+# If-Match 헤더에 조회할 때 받은 ETag 필요 ("*" 는 버전 확인 없이 수정)
+    # 없으면 428, 그 사이 다른 수정이 있었으면 412 -> 다시 조회해서 재시도
+# 버전 확인과 수정을 조건부 UPDATE 한 문장으로 처리하므로 잠금 없이 동시 수정을 막음
+@app.put("/api/products/{product_id}",response_model=schemas.Product,dependencies=[Depends(rate_limit('writes'))])
+async def update_product(
+    product_id:int,
+    product:schemas.ProductUpdate,
+    response:Response,
+    if_match:Optional[str] = Header(None),
+    db:AsyncSession=Depends(get_async_db)
+):
+    if if_match is None:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Product not found with id {product_id}"
+            status_code=status.HTTP_428_PRECONDITION_REQUIRED,
+            detail="If-Match header is required (ETag from GET /api/products/{product_id})"
         )
+    expected_version = parse_if_match(if_match)
     update_product =  product.model_dump(exclude_unset=True)  # 전달된 필드만 업데이트
-    for key,value in update_product.items():
-        setattr(db_product,key,value)  # 동적으로 속성 설정  변경감지 기능이 있어서 업데이트된 필드만 반영
-    db.commit()
-    db.refresh(db_product)
+    db_product = None
+    if expected_version is not None:
+        stmt = update(models.Product).where(models.Product.id == product_id)
+        if expected_version != WILDCARD:
+            stmt = stmt.where(models.Product.version == expected_version)
+        # UPDATE ... SET version = version + 1 WHERE id = ? AND version = ? RETURNING *
+        # 다른 요청이 먼저 수정했으면 버전이 달라서 0행 - 확인과 수정 사이에 끼어들 틈이 없음
+        db_product = (await db.scalars(
+            stmt.values(**update_product, version=models.Product.version + 1)
+            .returning(models.Product)
+        )).one_or_none()
+        await db.commit()
+    if db_product is None:
+        # 실패 원인 확인 (없는 제품 vs 버전 불일치) - 실패할 때만 조회
+        current_version = await db.scalar(
+            select(models.Product.version).where(models.Product.id == product_id)
+        )
+        # 다른 워커가 수정/삭제함 - 이 워커의 캐시(LocalCache)에 남은 이전 본문을 버려서 다음 조회는 최신 ETag
+        product_cache.invalidate_product(product_id)
+        if current_version is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Product not found with id {product_id}"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=f"Product {product_id} was modified (current ETag {version_etag(current_version)})",
+            headers={'ETag': version_etag(current_version)}
+        )
+    product_cache.invalidate_product(product_id)
+    response.headers['ETag'] = version_etag(db_product.version)
     return db_product
 
 
-@app.delete("/api/products/{product_id}",status_code=status.HTTP_204_NO_CONTENT)
-def delete_product(product_id:int, db:Session=Depends(get_db)):
-    product = db.query(models.Product).filter(models.Product.id == product_id).first()
-    if product is None:
+@app.delete("/api/products/{product_id}",status_code=status.HTTP_204_NO_CONTENT,dependencies=[Depends(rate_limit('writes'))])
+async def delete_product(product_id:int, db:AsyncSession=Depends(get_async_db)):
+    # DELETE ... RETURNING id - 삭제된 행이 없으면 404
+    deleted_id = (await db.scalars(
+        delete(models.Product).where(models.Product.id == product_id).returning(models.Product.id)
+    )).one_or_none()
+    await db.commit()
+    product_cache.invalidate_product(product_id)   # 없었어도 무효화 - 다른 워커가 삭제한 제품이 이 워커 캐시에 남지 않게
+    if deleted_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Product not found with id {product_id}"
         )
-    db.delete(product)
-    db.commit()
-    return None
\ No newline at end of file
+    return None
+
+# 캐시 적중 통계
+@app.get("/api/cache/stats")
+async def cache_stats():
+    return product_cache.stats()
+
+# 응답 압축 통계 - 인코딩별 압축 전/후 바이트, 절약한 바이트
+@app.get("/api/compression/stats")
+async def compression_stats_view():
+    return compression_stats.snapshot()
+
+# Prometheus 수집용 메트릭 (metrics.py)
+@app.get("/metrics", include_in_schema=False)
+async def metrics_view():
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
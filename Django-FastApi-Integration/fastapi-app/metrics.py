@@ -0,0 +1,213 @@
+# Prometheus 형식 메트릭 (GET /metrics)
+# prometheus_client 없이 필요한 만큼만 구현 - text exposition format 0.0.4
+#
+# 수집 항목
+#   http_requests_total                 라우트/메서드/상태코드별 요청 수
+#   http_request_duration_seconds       라우트별 응답 시간 히스토그램
+#   http_requests_in_flight             처리중인 요청 수
+#   http_request_sql_statements         요청 하나에서 실행된 SQL 문 수 히스토그램
+#   db_statements_total                 실행된 SQL 문 수 (요청 밖 포함)
+#   db_session_checkout_seconds         get_db/get_async_db 로 세션을 꺼내서 반납할 때까지 걸린 시간
+#   argon2_hash_seconds                 argon2 해싱/검증 시간 (auth.py 전용 풀에서 실행된 시간)
+#
+# 라우트 라벨은 실제 경로가 아니라 경로 템플릿 (/api/products/{product_id}) - 라벨 수가 늘어나지 않음
+# 워커(프로세스)마다 따로 집계되므로 Prometheus 에서 instance 별로 수집해서 합산
+import contextvars
+import threading
+import time
+from sqlalchemy import event
+
+# 히스토그램 구간(초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in zip(names, values)
+    )
+    return '{' + pairs + '}'
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()   # 해싱 시간은 스레드풀에서 기록됨
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, '') for name in self.labels)
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key: tuple, value) -> list:
+        return [f'{self.name}{_format_labels(self.labels, key)} {value}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # [구간별 개수..., 합계, 전체 개수]
+                entry = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[i] += 1
+                    break
+            entry[-2] += value
+            entry[-1] += 1
+
+    def _render_value(self, key: tuple, entry) -> list:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, entry):
+            cumulative += count
+            labels = _format_labels(self.labels + ('le',), key + (repr(float(bound)),))
+            lines.append(f'{self.name}_bucket{labels} {cumulative}')
+        labels = _format_labels(self.labels + ('le',), key + ('+Inf',))
+        lines.append(f'{self.name}_bucket{labels} {entry[-1]}')
+        labels = _format_labels(self.labels, key)
+        lines.append(f'{self.name}_sum{labels} {entry[-2]}')
+        lines.append(f'{self.name}_count{labels} {entry[-1]}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+REQUESTS = registry.register(Counter(
+    'http_requests_total', 'HTTP requests by route, method and status', ('method', 'route', 'status')))
+LATENCY = registry.register(Histogram(
+    'http_request_duration_seconds', 'HTTP request latency by route', ('method', 'route')))
+IN_FLIGHT = registry.register(Gauge(
+    'http_requests_in_flight', 'HTTP requests currently being processed'))
+REQUEST_SQL = registry.register(Histogram(
+    'http_request_sql_statements', 'SQL statements executed per request', ('method', 'route'),
+    buckets=SQL_COUNT_BUCKETS))
+SQL_STATEMENTS = registry.register(Counter(
+    'db_statements_total', 'SQL statements executed'))
+SESSION_CHECKOUT = registry.register(Histogram(
+    'db_session_checkout_seconds', 'Time a DB session is held by a request (get_db / get_async_db)', ('kind',)))
+ARGON2_SECONDS = registry.register(Histogram(
+    'argon2_hash_seconds', 'argon2 hash/verify time in the hashing pool', ('operation',),
+    buckets=HASH_BUCKETS))
+
+# 현재 요청의 SQL 문 수 - 요청마다 새 리스트를 넣고 SQLAlchemy 이벤트에서 증가
+# (aiosqlite 를 쓰는 async 엔진도 같은 컨텍스트에서 이벤트가 호출됨)
+_request_sql = contextvars.ContextVar('request_sql', default=None)
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    SQL_STATEMENTS.inc()
+    counter = _request_sql.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def instrument_engine(engine):
+    '''SQL 문 수 집계 - 동기 엔진(async 엔진은 .sync_engine)에 등록'''
+    event.listen(engine, 'before_cursor_execute', _count_statement)
+
+
+def observe_session(kind: str, started: float):
+    '''get_db / get_async_db 세션 반납시 호출'''
+    SESSION_CHECKOUT.observe(time.perf_counter() - started, kind=kind)
+
+
+def render() -> str:
+    return registry.render()
+
+
+class MetricsMiddleware:
+    '''요청 수/응답 시간/처리중 요청/요청당 SQL 수 집계 (ASGI)'''
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        status_code = 500
+        sql_count = [0]
+        token = _request_sql.set(sql_count)
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            IN_FLIGHT.dec()
+            _request_sql.reset(token)
+            # 라우터가 매칭한 라우트 (없으면 404 등 - 라벨을 하나로 묶음)
+            route = scope.get('route')
+            path = getattr(route, 'path', '<unmatched>')
+            method = scope['method']
+            REQUESTS.inc(method=method, route=path, status=status_code)
+            LATENCY.observe(elapsed, method=method, route=path)
+            REQUEST_SQL.observe(sql_count[0], method=method, route=path)
@@ -0,0 +1,82 @@
+# 스키마 마이그레이션
+# create_all 은 없는 테이블만 만들고, 이미 있는 테이블에 추가된 인덱스/가상테이블은 반영하지 않음
+# 버전 번호 순서대로 한번씩 적용하고 schema_migrations 테이블에 기록
+# 새 DB 는 create_all 이 이미 만들었으므로 IF NOT EXISTS / checkfirst 로 건너뜀
+#
+# 추가 방법
+# @migration(5, '설명')
+# def _add_something(connection):
+#     connection.execute(text('...'))
+from sqlalchemy import text, inspect
+import models
+from search import create_search_index
+
+MIGRATIONS = []
+
+
+def migration(version:int, description:str):
+    '''마이그레이션 함수 등록 데코레이터'''
+    def register(fn):
+        MIGRATIONS.append((version, description, fn))
+        return fn
+    return register
+
+
+def _create_product_indexes(connection, *names):
+    indexes = {index.name: index for index in models.Product.__table__.indexes}
+    for name in names:
+        indexes[name].create(bind=connection, checkfirst=True)
+
+
+@migration(1, 'products (created_at, id) index for cursor pagination')
+def _add_created_at_index(connection):
+    _create_product_indexes(connection, 'ix_products_created_at_id')
+
+
+@migration(2, 'products_fts full-text search table and triggers')
+def _add_search_index(connection):
+    create_search_index(connection)
+
+
+@migration(3, 'products filter/sort indexes on price, stock, owner_id, updated_at')
+def _add_filter_indexes(connection):
+    # owner_id 가 모델에 추가되기 전에 만든 DB (ex. 저장소의 products.db) 는 컬럼부터 추가
+    # 기존 행에는 소유자가 없으므로 NULL 허용 (SQLite 는 NOT NULL 컬럼을 기본값 없이 추가할 수 없음)
+    columns = {column['name'] for column in inspect(connection).get_columns('products')}
+    if 'owner_id' not in columns:
+        connection.execute(text('ALTER TABLE products ADD COLUMN owner_id INTEGER REFERENCES users(id)'))
+    _create_product_indexes(
+        connection,
+        'ix_products_updated_at_id',
+        'ix_products_price_id',
+        'ix_products_stock_id',
+        'ix_products_owner_id_price',
+    )
+
+
+@migration(4, 'products.version row version for optimistic concurrency')
+def _add_product_version(connection):
+    columns = {column['name'] for column in inspect(connection).get_columns('products')}
+    if 'version' not in columns:
+        connection.execute(text('ALTER TABLE products ADD COLUMN version INTEGER NOT NULL DEFAULT 1'))
+
+
+def upgrade(engine):
+    '''아직 적용되지 않은 마이그레이션을 순서대로 적용 (앱 시작시 호출)'''
+    with engine.begin() as connection:
+        connection.execute(text(
+            'CREATE TABLE IF NOT EXISTS schema_migrations ('
+            'version INTEGER PRIMARY KEY, description VARCHAR(200), '
+            'applied_at DATETIME DEFAULT CURRENT_TIMESTAMP)'
+        ))
+        applied = set(connection.execute(text('SELECT version FROM schema_migrations')).scalars())
+        for version, description, fn in sorted(MIGRATIONS, key=lambda m: m[0]):
+            if version in applied:
+                continue
+            fn(connection)
+            # 여러 워커가 동시에 시작해도 같은 버전은 한번만 기록
+            connection.execute(
+                text('INSERT OR IGNORE INTO schema_migrations (version, description) VALUES (:v, :d)'),
+                {'v': version, 'd': description}
+            )
+            print(f" 마이그레이션 적용: {version} {description}")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float,DateTime,Text,ForeignKey
+from sqlalchemy import Column, Integer, String, Float,DateTime,Text,ForeignKey,Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -29,8 +29,21 @@ class Product(Base):
     description = Column(Text, nullable=True)
     price = Column(Float, nullable=False)
     stock = Column(Integer, default=0)
-    owner_id = Column(Integer, ForeignKey('users.id'),nullable=False)
+    # 소유자 - POST /api/products 는 로그인 없이 생성하므로 비어있을 수 있음 (bulk 생성은 로그인한 사용자)
+    owner_id = Column(Integer, ForeignKey('users.id'),nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now() ,server_default=func.now())
+    # 낙관적 동시성 제어용 행 버전 - 수정할 때마다 1 증가, ETag 로 전달 (etag.py)
+    version = Column(Integer, nullable=False, default=1, server_default='1')
 
-    owner = relationship('User', back_populates='products')
\ No newline at end of file
+    owner = relationship('User', back_populates='products')
+
+    # 정렬/필터용 복합 인덱스 - 기존 DB 에는 migrations.py 로 추가
+    # (컬럼, id) : 해당 컬럼 범위 검색 + 같은 순서로 정렬/커서 페이지네이션
+    __table_args__ = (
+        Index('ix_products_created_at_id', 'created_at', 'id'),
+        Index('ix_products_updated_at_id', 'updated_at', 'id'),
+        Index('ix_products_price_id', 'price', 'id'),
+        Index('ix_products_stock_id', 'stock', 'id'),
+        Index('ix_products_owner_id_price', 'owner_id', 'price'),  # 소유자별 목록 + 가격 조건/정렬
+    )
\ No newline at end of file
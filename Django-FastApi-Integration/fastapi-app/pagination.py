@@ -0,0 +1,100 @@
+# 정렬 + 키셋(커서) 페이지네이션
+# offset 방식은 건너뛴 행을 전부 읽고 버리기 때문에 뒤쪽 페이지일수록 느려짐
+# 커서 방식은 마지막 행의 정렬키 "이후"를 인덱스로 바로 찾아가므로 몇번째 페이지든 비용이 같음
+# 커서는 클라이언트 입장에서 의미없는 문자열(opaque) - 내용을 해석하거나 만들면 안됨
+import base64
+import json
+from datetime import datetime, timezone
+from sqlalchemy import tuple_
+import models
+
+# 지원하는 정렬키 - 앞에 '-' 를 붙이면 내림차순  ex) order=-price
+# 항상 id 를 마지막에 붙여서 순서가 유일하도록 보장 (같은 가격/시간의 행이 여러개일 수 있음)
+# 각 정렬키는 models.Product 의 (컬럼, id) 복합 인덱스를 사용 (내림차순은 인덱스를 역방향으로 읽음)
+SORT_COLUMNS = {
+    'id': (models.Product.id,),
+    'created_at': (models.Product.created_at, models.Product.id),
+    'updated_at': (models.Product.updated_at, models.Product.id),
+    'price': (models.Product.price, models.Product.id),
+    'stock': (models.Product.stock, models.Product.id),
+}
+
+# SQLite 의 CURRENT_TIMESTAMP 저장 형식 (UTC)
+# 문자열로 비교되기 때문에 바인딩 값도 같은 형식이어야 함
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def format_timestamp(value: datetime) -> str:
+    '''datetime -> DB 저장 형식 문자열 (timezone 이 있으면 UTC 로 변환)'''
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.strftime(TIMESTAMP_FORMAT)
+
+
+def parse_order(order: str):
+    '''정렬 파라메터 -> (정렬 컬럼들, 내림차순 여부)'''
+    descending = order.startswith('-')
+    key = order.lstrip('-')
+    if key not in SORT_COLUMNS:
+        raise ValueError(f"Unsupported order '{order}' ({' | '.join(SORT_COLUMNS)}, '-' for descending)")
+    return SORT_COLUMNS[key], descending
+
+
+def ordered_statement(stmt, order: str):
+    '''select 문에 정렬 추가 (offset 방식)'''
+    columns, descending = parse_order(order)
+    return stmt.order_by(*[c.desc() if descending else c for c in columns])
+
+
+def encode_cursor(order: str, values: list) -> str:
+    '''정렬키 값을 커서 문자열로 변환'''
+    values = [format_timestamp(v) if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps({'o': order, 'v': values}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple:
+    '''커서 문자열을 (정렬키, 값목록) 으로 변환 - 잘못된 커서는 ValueError'''
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        order, values = data['o'], data['v']
+        columns, _ = parse_order(order)
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError('Invalid cursor')
+    return order, values
+
+
+def keyset_statement(stmt, order: str, cursor: str, limit: int):
+    '''select 문에 커서 조건/정렬/limit 추가
+
+    cursor 가 빈 문자열이면 첫 페이지
+    다음 페이지 존재 여부를 알기 위해 limit + 1 개를 조회
+    '''
+    columns, descending = parse_order(order)
+    if cursor:
+        cursor_order, values = decode_cursor(cursor)
+        if cursor_order != order:
+            raise ValueError('Cursor does not match order')
+        # (price, id) > (:price, :id)  - SQLite row value 비교, 인덱스 범위 검색
+        if descending:
+            stmt = stmt.where(tuple_(*columns) < tuple_(*values))
+        else:
+            stmt = stmt.where(tuple_(*columns) > tuple_(*values))
+    return ordered_statement(stmt, order).limit(limit + 1)
+
+
+def split_page(rows: list, order: str, limit: int):
+    '''keyset_statement 결과 -> (이번 페이지 행, 다음 페이지 커서)
+
+    다음 페이지가 없으면 next_cursor 는 None
+    '''
+    columns, _ = parse_order(order)
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit and items:
+        last = items[-1]
+        next_cursor = encode_cursor(order, [getattr(last, c.key) for c in columns])
+    return items, next_cursor
@@ -0,0 +1,170 @@
+# 요청 속도 제한 (token bucket)
+# 키마다 버킷 하나 - 초당 rate 개씩 토큰이 차고 최대 burst 개까지 쌓임, 요청 하나에 토큰 하나 사용
+# 토큰이 없으면 429 + Retry-After (다음 토큰이 찰 때까지 남은 초)
+#
+# 키 : 라우트 이름 + 사용자
+#   - Bearer 토큰이 유효하면 사용자 이름 (auth.username_from_token - 캐시된 JWT 검증, DB 조회 없음)
+#   - 없으면 클라이언트 IP
+#     직접 연결한 주소가 신뢰하는 프록시(RATE_LIMIT_TRUSTED_PROXIES, 기본값 localhost)면 X-Forwarded-For 에서
+#     오른쪽부터 신뢰하는 프록시를 건너뛴 첫 주소를 사용 - 같은 서버의 Django 가 전달한 최종 사용자 주소
+#     (Django 가 REMOTE_ADDR 를 전달하지 않으면 모든 사용자가 127.0.0.1 버킷 하나를 같이 씀)
+#     RATE_LIMIT_TRUST_PROXY=1 이면 모든 연결을 프록시로 신뢰하고 첫번째 주소 사용
+#
+# 라우트별 설정 : RATE_LIMITS 의 이름을 라우트에 지정
+#   @app.get('/api/products', dependencies=[Depends(rate_limit('products'))])
+#   환경변수로 변경 가능  RATE_LIMIT_PRODUCTS="50,100"  (초당 토큰, 최대 토큰)
+#
+# 백엔드 교체 가능 (cache.py 와 같은 방식)
+#   - LocalBucketStore : 프로세스 내부 (기본값, 워커마다 따로 제한)
+#   - RedisBucketStore : Redis 호환 클라이언트 - 워커/서버끼리 같은 버킷 공유 (Lua 스크립트로 원자적 처리)
+#   configure(RedisBucketStore(redis.Redis(...))) 로 교체
+# 오버헤드 측정 : python bench_ratelimit.py
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from fastapi import HTTPException, Request, status
+from auth import username_from_token
+from metrics import Counter, registry
+
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', '1') == '1'
+RATE_LIMIT_TRUST_PROXY = os.getenv('RATE_LIMIT_TRUST_PROXY', '0') == '1'
+RATE_LIMIT_TRUSTED_PROXIES = frozenset(
+    address.strip() for address in os.getenv('RATE_LIMIT_TRUSTED_PROXIES', '127.0.0.1,::1').split(',') if address.strip()
+)
+RATE_LIMIT_MAX_BUCKETS = 100000   # LocalBucketStore 가 보관할 최대 버킷 수 (오래 안쓴 버킷부터 제거)
+
+
+def _limit_setting(name: str, rate: float, burst: int):
+    '''(초당 토큰, 최대 토큰) - 환경변수 RATE_LIMIT_<NAME>="rate,burst" 가 있으면 사용'''
+    value = os.getenv(f'RATE_LIMIT_{name.upper()}')
+    if value:
+        rate, burst = value.split(',')
+    return float(rate), int(burst)
+
+
+RATE_LIMITS = {
+    'products': _limit_setting('products', 20, 40),    # 목록/상세/검색 조회
+    'export': _limit_setting('export', 0.1, 2),         # 전체 내보내기 - 10초에 1번
+    'writes': _limit_setting('writes', 5, 10),          # 생성/수정/삭제/대량 처리
+    'login': _limit_setting('login', 0.2, 5),           # 로그인 - 5번 연속 이후 5초에 1번 (무차별 대입 방지)
+    'register': _limit_setting('register', 0.05, 3),    # 회원가입 - 20초에 1번
+}
+
+RATE_LIMITED = registry.register(Counter(
+    'http_rate_limited_total', 'Requests rejected by the rate limiter', ('limit',)))
+
+
+class LocalBucketStore:
+    '''프로세스 내부 버킷 - 키 -> (남은 토큰, 마지막 갱신 시각)'''
+    def __init__(self, maxsize: int = RATE_LIMIT_MAX_BUCKETS):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        '''토큰 하나 사용 - 성공하면 0, 부족하면 다음 토큰까지 기다려야 하는 초'''
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.maxsize:
+                # 오래 안쓴 버킷은 이미 가득 찼을 가능성이 높으므로 제거해도 제한이 거의 풀리지 않음
+                self._buckets.popitem(last=False)
+            return wait
+
+
+class RedisBucketStore:
+    '''Redis 호환 클라이언트를 감싼 버킷 - 계산을 Lua 스크립트로 서버에서 원자적으로 처리'''
+    SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local clock = redis.call('TIME')
+    local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or burst
+    local updated = tonumber(bucket[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+    local wait = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        wait = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return tostring(wait)
+    """
+
+    def __init__(self, client, prefix: str = 'ratelimit:'):
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(self.SCRIPT)
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        wait = self._script(keys=[self.prefix + key], args=[rate, burst])
+        if isinstance(wait, bytes):
+            wait = wait.decode()
+        return float(wait)
+
+
+class RateLimiter:
+    def __init__(self, store, enabled: bool = RATE_LIMIT_ENABLED):
+        self.store = store
+        self.enabled = enabled
+
+
+limiter = RateLimiter(LocalBucketStore())
+
+
+def configure(store):
+    '''버킷 백엔드 교체 - 앱 시작시 호출'''
+    limiter.store = store
+
+
+def client_key(request: Request) -> str:
+    '''제한 단위 - 로그인 사용자면 user:<이름>, 아니면 ip:<주소>'''
+    authorization = request.headers.get('authorization', '')
+    scheme, _, token = authorization.partition(' ')
+    if scheme.lower() == 'bearer' and token:
+        username = username_from_token(token)
+        if username is not None:
+            return f'user:{username}'
+    peer = request.client.host if request.client else 'unknown'
+    forwarded = request.headers.get('x-forwarded-for')
+    hops = [address.strip() for address in forwarded.split(',') if address.strip()] if forwarded else []
+    if hops:
+        if RATE_LIMIT_TRUST_PROXY:
+            return 'ip:' + hops[0]
+        if peer in RATE_LIMIT_TRUSTED_PROXIES:
+            # 프록시는 오른쪽에 주소를 덧붙이므로 오른쪽부터 확인 - 왼쪽 값은 클라이언트가 임의로 넣을 수 있음
+            for address in reversed(hops):
+                if address not in RATE_LIMIT_TRUSTED_PROXIES:
+                    return 'ip:' + address
+    return 'ip:' + peer
+
+
+def rate_limit(name: str):
+    '''라우트 의존성 - RATE_LIMITS[name] 설정으로 제한'''
+    rate, burst = RATE_LIMITS[name]
+
+    async def dependency(request: Request):
+        if not limiter.enabled:
+            return
+        wait = limiter.store.take(f'{name}:{client_key(request)}', rate, burst)
+        if wait > 0:
+            RATE_LIMITED.inc(limit=name)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail='Too many requests, retry later',
+                headers={'Retry-After': str(math.ceil(wait))},
+            )
+    return dependency
@@ -1,5 +1,5 @@
 from pydantic import BaseModel  # 모든 스키마의 기본 클래스
-from typing import Optional   # 선택필드
+from typing import Optional, List   # 선택필드
 from datetime import datetime
 
 # 공통필드
@@ -63,7 +63,39 @@ class ProductUpdate(BaseModel):
 # 응답 스키마
 class Product(ProductBase):
     id : int
+    version : int   # 행 버전 - 수정시 If-Match 로 전달
     created_at : datetime
     updated_at : datetime    
     class Config:
-        from_atributes = True  # ORM 모델을 Pydantic 모델로 변환
\ No newline at end of file
+        from_atributes = True  # ORM 모델을 Pydantic 모델로 변환
+
+# 커서 페이지네이션 응답
+# next_cursor 를 다음 요청의 cursor 로 전달, None 이면 마지막 페이지
+class ProductPage(BaseModel):
+    items : List[Product]
+    next_cursor : Optional[str] = None
+
+
+##########################################################################
+# 대량 처리(bulk) 스키마
+# 요청은 JSON 배열 또는 NDJSON(한 줄에 JSON 하나), 응답은 항목별 처리 결과
+
+# 대량 수정 - id 와 바꿀 필드만 전달
+class ProductBulkUpdate(ProductUpdate):
+    id : int
+
+# 대량 삭제 - 숫자 id 또는 {"id": ...}
+class ProductBulkDelete(BaseModel):
+    id : int
+
+class BulkItemResult(BaseModel):
+    index : int                     # 요청에서의 위치 (0부터)
+    status : str                    # created | updated | unchanged | deleted | not_found | invalid
+    id : Optional[int] = None
+    detail : Optional[str] = None
+
+class BulkResult(BaseModel):
+    total : int
+    succeeded : int
+    failed : int
+    results : List[BulkItemResult]
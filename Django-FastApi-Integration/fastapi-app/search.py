@@ -0,0 +1,80 @@
+# 제품 전문 검색 (SQLite FTS5)
+# name 의 B-tree 인덱스는 앞에서부터 같은 값만 찾을 수 있어서 단어 검색/설명 검색이 불가능
+# products 를 원본으로 하는 FTS5 가상 테이블(external content)을 두고 트리거로 동기화
+#   - products INSERT/UPDATE/DELETE 시 트리거가 products_fts 색인을 갱신
+#   - 검색어의 각 단어를 접두어 검색("노트"* -> 노트북) 하고 AND 로 연결
+#   - bm25 점수(rank) 순으로 정렬
+# 기존 DB 에는 migrations.py 에서 생성
+# 토크나이저 unicode61 은 한글 음절도 문자로 취급하므로 띄어쓰기 단위 단어 + 접두어 검색 가능
+import re
+from sqlalchemy import event, select, text, inspect
+from sqlalchemy.sql import table, column
+import models
+
+# create_all 이 일반 테이블로 만들지 않도록 metadata 밖에서 정의 (조회용)
+products_fts = table('products_fts', column('rowid'), column('rank'))
+
+SEARCH_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description,
+        content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+]
+
+
+def create_search_index(connection):
+    '''FTS5 테이블/트리거 생성 - 새로 만든 경우 기존 products 행으로 색인 재구성'''
+    if connection.dialect.name != 'sqlite':
+        return
+    existed = inspect(connection).has_table('products_fts')
+    for ddl in SEARCH_DDL:
+        connection.execute(text(ddl))
+    if not existed:
+        connection.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+
+
+# create_all 로 products 테이블을 만들 때 같이 생성
+@event.listens_for(models.Product.__table__, 'after_create')
+def _create_search_index(target, connection, **kw):
+    create_search_index(connection)
+
+
+def build_match_query(q:str) -> str:
+    '''사용자 검색어 -> FTS5 MATCH 식
+
+    특수문자는 버리고 단어마다 접두어 검색, 모든 단어 포함(AND)
+    "무선 마우" -> "무선"* "마우"*
+    '''
+    words = re.findall(r'\w+', q)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_statement(match:str, skip:int, limit:int, stmt=None):
+    '''검색 결과 제품 조회문 - 관련도(bm25) 순
+
+    stmt 로 조회할 컬럼을 바꿀 수 있음 (기본은 select(models.Product))
+    '''
+    if stmt is None:
+        stmt = select(models.Product)
+    return (
+        stmt
+        .join(products_fts, products_fts.c.rowid == models.Product.id)
+        .where(text('products_fts MATCH :match').bindparams(match=match))
+        .order_by(products_fts.c.rank, models.Product.id)
+        .offset(skip)
+        .limit(limit)
+    )
@@ -0,0 +1,148 @@
+# SQL 추적 + N+1 탐지 (개발/스테이징용)
+# 요청마다 실행된 SQL 문을 모두 기록하고
+#   - 같은 SQL(파라메터만 다른)이 SQL_TRACE_N_PLUS_ONE 번 이상 반복되면 N+1 의심으로 경고
+#     ex) 제품 목록을 돌면서 product.owner 를 하나씩 조회 -> SELECT ... FROM users WHERE users.id = ? 가 N번
+#   - 요청 하나의 SQL 문 수가 SQL_QUERY_BUDGET 을 넘으면 경고
+#   - SQL_TRACE_STRICT=1 이면 경고 대신 예외 -> 테스트(TestClient)가 실패함
+# 응답 헤더 X-SQL-Count / X-SQL-Time-Ms 로 확인 가능
+#
+# 켜는 방법 (운영에서는 끄기 - 모든 SQL 문자열을 보관하므로 비용이 있음)
+#   SQL_TRACE=1 SQL_QUERY_BUDGET=10 uvicorn main:app
+#
+# 테스트에서 사용 (SQL_TRACE=1 로 main 을 import 해야 미들웨어가 등록됨)
+#   with sqltrace.capture() as traces:
+#       client.get('/api/products')
+#   sqltrace.assert_query_budget(traces, 5)
+import contextvars
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Optional
+from sqlalchemy import event
+
+SQL_TRACE_ENABLED = os.getenv('SQL_TRACE', '0') == '1'
+SQL_QUERY_BUDGET = int(os.getenv('SQL_QUERY_BUDGET', 0)) or None       # 요청당 최대 SQL 문 수 (0 이면 제한 없음)
+SQL_TRACE_N_PLUS_ONE = int(os.getenv('SQL_TRACE_N_PLUS_ONE', 3))      # 같은 SQL 반복 횟수 기준
+SQL_TRACE_STRICT = os.getenv('SQL_TRACE_STRICT', '0') == '1'
+
+
+class QueryBudgetExceeded(AssertionError):
+    '''SQL 문 수 초과 또는 N+1 의심 (strict 모드/테스트)'''
+
+
+class RequestTrace:
+    '''요청 하나에서 실행된 SQL 목록'''
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.statements = []   # (SQL, 실행시간 초)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def total_time(self) -> float:
+        return sum(elapsed for _, elapsed in self.statements)
+
+    def n_plus_one_suspects(self, threshold: int = SQL_TRACE_N_PLUS_ONE) -> list:
+        '''threshold 번 이상 반복된 SQL - [(SQL, 횟수)]'''
+        repeated = Counter(statement for statement, _ in self.statements)
+        return [(statement, count) for statement, count in repeated.most_common() if count >= threshold]
+
+    def problems(self, budget: Optional[int] = SQL_QUERY_BUDGET, threshold: int = SQL_TRACE_N_PLUS_ONE) -> list:
+        '''예산 초과/N+1 의심 내용 (없으면 빈 목록)'''
+        problems = []
+        if budget is not None and self.count > budget:
+            problems.append(f"{self.count} SQL statements (budget {budget})")
+        for statement, count in self.n_plus_one_suspects(threshold):
+            problems.append(f"N+1 suspect x{count}: {' '.join(statement.split())[:200]}")
+        return problems
+
+
+_current = contextvars.ContextVar('sql_trace', default=None)
+_captures = []                  # capture() 로 수집중인 목록들
+_captures_lock = threading.Lock()
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        context._sqltrace_started = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    trace = _current.get()
+    if trace is None:
+        return
+    started = getattr(context, '_sqltrace_started', time.perf_counter())
+    # executemany 는 문장 하나로 기록 (bulk 처리는 N+1 이 아님)
+    trace.statements.append((statement, time.perf_counter() - started))
+
+
+def instrument_engine(engine):
+    '''SQL 기록 - 동기 엔진(async 엔진은 .sync_engine)에 등록'''
+    event.listen(engine, 'before_cursor_execute', _before_execute)
+    event.listen(engine, 'after_cursor_execute', _after_execute)
+
+
+@contextmanager
+def capture():
+    '''블록 안에서 끝난 요청의 RequestTrace 를 모음 (테스트용)'''
+    traces = []
+    with _captures_lock:
+        _captures.append(traces)
+    try:
+        yield traces
+    finally:
+        with _captures_lock:
+            _captures.remove(traces)
+
+
+def assert_query_budget(traces: list, budget: int, threshold: int = SQL_TRACE_N_PLUS_ONE):
+    '''수집한 요청 중 예산 초과/N+1 의심이 있으면 QueryBudgetExceeded'''
+    failures = []
+    for trace in traces:
+        for problem in trace.problems(budget, threshold):
+            failures.append(f"{trace.method} {trace.path}: {problem}")
+    if failures:
+        raise QueryBudgetExceeded('\n'.join(failures))
+
+
+class SQLTraceMiddleware:
+    '''요청별 SQL 기록 - 응답 헤더 추가, 문제 발견시 경고(또는 strict 모드에서 예외)'''
+    def __init__(self, app, budget: Optional[int] = SQL_QUERY_BUDGET, strict: bool = SQL_TRACE_STRICT):
+        self.app = app
+        self.budget = budget
+        self.strict = strict
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        trace = RequestTrace(scope['method'], scope['path'])
+        token = _current.set(trace)
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                # 스트리밍 응답은 본문을 보내면서 실행되는 SQL 이 헤더에는 빠짐
+                headers = list(message.get('headers', []))
+                headers.append((b'x-sql-count', str(trace.count).encode()))
+                headers.append((b'x-sql-time-ms', f'{trace.total_time * 1000:.2f}'.encode()))
+                message = {**message, 'headers': headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+        with _captures_lock:
+            for traces in _captures:
+                traces.append(trace)
+        problems = trace.problems(self.budget)
+        if problems:
+            report = '\n'.join(f"  {problem}" for problem in problems)
+            if self.strict:
+                raise QueryBudgetExceeded(f"{trace.method} {trace.path}\n{report}")
+            print(f"[sqltrace] {trace.method} {trace.path} ({trace.count} SQL, {trace.total_time * 1000:.1f}ms)\n{report}")
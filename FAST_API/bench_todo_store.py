@@ -0,0 +1,106 @@
+"""
+todo 저장소 백엔드 벤치마크 (todo_storage.py)
+
+writes  : 스레드 N 개가 동시에 create/update - 초당 쓰기 수
+          memory / log(batch, async) / sqlite(batch) / shared(batch - 여러 워커용, 요청마다 SQLite 직접 사용)
+          --threads 1 이면 요청 하나당 fsync 한번과 같음 -> 스레드를 늘리면 fsync 를 같이 하므로 처리량이 늘어남
+startup : 저장된 todo N 개를 다시 읽는 시간 - 로그만 있을 때 / 스냅샷 이후
+
+임시 디렉토리 사용
+실행 : python bench_todo_store.py --writes 5000 --threads 16 --startup 200000
+"""
+import argparse
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+from todo_shared import SharedTodoStore
+from todo_store import TodoStore
+from todo_storage import LogBackend, SQLiteBackend
+
+
+def bench_writes(name: str, make_store, writes: int, threads: int) -> dict:
+    store = make_store()
+    per_thread = writes // threads
+
+    def worker():
+        for i in range(per_thread):
+            todo = store.create(title=f'할일 {i}', description=None)
+            if i % 2:
+                store.update(todo['id'], completed=True)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+    store.close()
+    count = per_thread * threads * 3 // 2   # create + update 절반
+    return {'case': 'writes', 'backend': name, 'threads': threads, 'writes_per_sec': round(count / elapsed)}
+
+
+def bench_startup(root: Path, count: int) -> list:
+    results = []
+    for label, compact_every in (('log only', count * 10), ('snapshot', count)):
+        path = root / f'startup-{compact_every}'
+        store = TodoStore(backend=LogBackend(path, sync='async', compact_every=compact_every))
+        for i in range(count):
+            store.create(title=f'할일 {i}', description=None)
+        store.create(title='스냅샷 이후', description=None)
+        store.close()
+        started = time.perf_counter()
+        store = TodoStore(backend=LogBackend(path))
+        elapsed = time.perf_counter() - started
+        assert len(store) == count + 1
+        store.close()
+        results.append({'case': 'startup', 'storage': label, 'todos': count + 1, 'seconds': round(elapsed, 3)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='todo 저장소 백엔드 벤치마크')
+    parser.add_argument('--writes', type=int, default=5000, help='백엔드별 생성 수')
+    parser.add_argument('--threads', type=int, default=16, help='동시 스레드 수')
+    parser.add_argument('--startup', type=int, default=200000, help='재시작 측정용 todo 수 (0 이면 생략)')
+    parser.add_argument('--json', action='store_true', help='결과를 JSON 한 줄씩 출력')
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix='bench_todo_store_'))
+    backends = {
+        'memory': lambda: TodoStore(),
+        'log/batch': lambda: TodoStore(backend=LogBackend(root / 'log-batch')),
+        'log/async': lambda: TodoStore(backend=LogBackend(root / 'log-async', sync='async')),
+        'sqlite/batch': lambda: TodoStore(backend=SQLiteBackend(root / 'todos.sqlite3')),
+        'shared/batch': lambda: SharedTodoStore(root / 'shared.sqlite3'),
+    }
+    results = []
+    for threads in sorted({1, args.threads}):
+        for name, make_store in backends.items():
+            results.append(bench_writes(name, make_store, args.writes if threads > 1 else args.writes // 10, threads))
+            for path in root.iterdir():   # 다음 측정은 빈 저장소에서
+                if path.is_dir():
+                    for child in path.iterdir():
+                        child.unlink()
+                else:
+                    path.unlink()
+    if args.startup:
+        results.extend(bench_startup(root, args.startup))
+
+    if args.json:
+        for result in results:
+            print(json.dumps(result, ensure_ascii=False))
+        return
+    print("=" * 60)
+    for result in results:
+        if result['case'] == 'writes':
+            print(f"writes  {result['backend']:<13} threads {result['threads']:>3} : {result['writes_per_sec']:>8} writes/sec")
+        else:
+            print(f"startup {result['storage']:<13} {result['todos']} todos : {result['seconds']} s")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
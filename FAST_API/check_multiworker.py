@@ -0,0 +1,155 @@
+"""
+여러 워커(uvicorn --workers N)에서 todo 상태가 하나로 유지되는지 확인 (main4.py)
+
+uvicorn 을 워커 N 개로 띄우고 (임시 TODO_DATA_DIR) 스레드 여러개로 동시에 요청
+  1. 동시에 추가 -> id 가 겹치지 않는지, 전체 개수가 맞는지
+  2. 절반 완료 처리, 일부 삭제 -> 어느 워커가 받아도 같은 결과인지 (/health, /todos, 개별 조회)
+  3. 같은 todo 를 여러 워커에서 동시에 수정 -> 요청이 끝난 뒤 모든 워커가 같은 값인지
+
+결과는 PASS / FAIL (실패하면 종료코드 1)
+--storage memory 로 실행하면 워커마다 따로 저장해서 실패하는 것을 확인할 수 있음
+
+실행 : python check_multiworker.py --workers 4 --todos 400 --threads 32
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+
+
+def request(base_url: str, method: str, path: str, body=None):
+    '''요청 -> (상태코드, JSON 응답 - 없으면 None)'''
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method=method,
+                                 headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            payload = response.read()
+            return response.status, (json.loads(payload) if payload else None)
+    except urllib.error.HTTPError as e:
+        return e.code, None
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, workers: int, storage: str, data_dir: str) -> subprocess.Popen:
+    env = {**os.environ, 'TODO_STORAGE': storage, 'TODO_DATA_DIR': data_dir}
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main4:app', '--port', str(port), '--workers', str(workers),
+         '--log-level', 'warning'],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL)   # 앱의 print 출력은 생략 (에러는 stderr 로 표시)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f'uvicorn 종료됨 (exit {server.returncode})')
+        try:
+            request(base_url, 'GET', '/health')
+            time.sleep(1)   # 나머지 워커도 뜰 때까지 잠깐 대기
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError('uvicorn 시작 시간 초과')
+
+
+def check(results: list, name: str, ok: bool, detail: str = ''):
+    results.append(ok)
+    print(f"{'PASS' if ok else 'FAIL'}  {name}" + (f'  ({detail})' if detail else ''))
+
+
+def run_checks(base_url: str, todos: int, threads: int, repeat: int) -> list:
+    results = []
+    with ThreadPoolExecutor(threads) as pool:
+        # 1. 동시에 추가
+        created = list(pool.map(
+            lambda i: request(base_url, 'POST', '/todos', {'title': f'할일 {i}', 'descriprion': None}),
+            range(todos)))
+        ids = [todo['id'] for code, todo in created if code == 201]
+        check(results, 'create 201', len(ids) == todos, f'{len(ids)}/{todos}')
+        check(results, 'unique ids', len(set(ids)) == len(ids), f'{len(ids) - len(set(ids))} duplicates')
+
+        # 2. 절반 완료, 1/4 삭제
+        completed_ids, deleted_ids = ids[::2], ids[1::4]
+        updated = list(pool.map(
+            lambda todo_id: request(base_url, 'PUT', f'/todos/{todo_id}', {'title': f'완료 {todo_id}', 'completed': True})[0],
+            completed_ids))
+        check(results, 'update 200', updated.count(200) == len(completed_ids),
+              f'{updated.count(200)}/{len(completed_ids)}')
+        deleted = list(pool.map(lambda todo_id: request(base_url, 'DELETE', f'/todos/{todo_id}')[0], deleted_ids))
+        check(results, 'delete 204', deleted.count(204) == len(deleted_ids),
+              f'{deleted.count(204)}/{len(deleted_ids)}')
+
+        remaining = sorted(set(ids) - set(deleted_ids))
+        expected = {'status': 'healthy', 'total': len(remaining),
+                    'completed': len(completed_ids), 'pending': len(remaining) - len(completed_ids)}
+        # 요청마다 다른 워커가 받을 수 있으므로 여러번 조회해서 모두 같은지 확인
+        healths = list(pool.map(lambda _: request(base_url, 'GET', '/health')[1], range(repeat)))
+        wrong = [health for health in healths if health != expected]
+        check(results, 'health consistent', not wrong, f'expected {expected}, got {wrong[0]}' if wrong else '')
+        listings = list(pool.map(lambda _: request(base_url, 'GET', '/todos')[1], range(repeat)))
+        wrong = [todo_list for todo_list in listings if [todo['id'] for todo in todo_list] != remaining]
+        check(results, 'list consistent', not wrong, f'{len(wrong)}/{repeat} listings differ')
+        pages, cursor = [], ''
+        while cursor is not None:
+            page = request(base_url, 'GET', f'/todos?limit=50&cursor={cursor}')[1]
+            pages.extend(todo['id'] for todo in page['items'])
+            cursor = page['next_cursor']
+        check(results, 'pages consistent', pages == remaining, f'{len(pages)}/{len(remaining)}')
+        gone = list(pool.map(lambda todo_id: request(base_url, 'GET', f'/todos/{todo_id}')[0], deleted_ids * repeat))
+        check(results, 'deleted everywhere', set(gone) == {404}, f'{gone.count(200)} still found')
+        done = [todo_id for todo_id in completed_ids if todo_id not in deleted_ids]
+        seen = list(pool.map(lambda todo_id: request(base_url, 'GET', f'/todos/{todo_id}')[1], done * repeat))
+        wrong = [todo for todo in seen if not (todo and todo['completed'])]
+        check(results, 'updates everywhere', not wrong, f'{len(wrong)} not completed')
+
+        # 3. 같은 todo 를 동시에 수정 - 마지막 값 하나로 모든 워커가 일치해야 함
+        target = remaining[-1]
+        list(pool.map(lambda i: request(base_url, 'PUT', f'/todos/{target}', {'title': f'수정 {i}'}), range(threads * 2)))
+        titles = {todo and todo['title'] for todo in pool.map(
+            lambda _: request(base_url, 'GET', f'/todos/{target}')[1], range(repeat))}
+        check(results, 'concurrent update converges', len(titles) == 1, f'{len(titles)} different titles')
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='여러 워커에서 todo 상태 확인 (main4.py)')
+    parser.add_argument('--workers', type=int, default=4, help='uvicorn 워커 수')
+    parser.add_argument('--todos', type=int, default=400, help='동시에 추가할 todo 수')
+    parser.add_argument('--threads', type=int, default=32, help='동시 요청 스레드 수')
+    parser.add_argument('--repeat', type=int, default=40, help='일관성 확인용 반복 조회 수')
+    parser.add_argument('--storage', default='shared', help='TODO_STORAGE 값 (memory 면 실패하는 것이 정상)')
+    args = parser.parse_args()
+
+    port = free_port()
+    with tempfile.TemporaryDirectory(prefix='check_multiworker_') as data_dir:
+        server = start_server(port, args.workers, args.storage, data_dir)
+        try:
+            print("=" * 60)
+            print(f"main4 workers {args.workers}  storage {args.storage}  todos {args.todos}  threads {args.threads}")
+            print("=" * 60)
+            results = run_checks(f'http://127.0.0.1:{port}', args.todos, args.threads, args.repeat)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+    print("=" * 60)
+    print(f"{'PASS' if all(results) else 'FAIL'}  {results.count(True)}/{len(results)} checks")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,18 @@
 # Step 5: 프론트엔드 연동
 # 목표: HTML + jQuery와 FastAPI 백엔드 연결하기
 
-from fastapi import FastAPI, HTTPException, status
+import sys
+from pathlib import Path
+from fastapi import FastAPI, HTTPException, Query, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Optional
-from datetime import datetime
+from typing import Optional, Union
+
+# 상위 폴더(FAST_API)의 공유 저장소 사용 - frontend 폴더에서 uvicorn main:app 으로 실행하므로 경로 추가
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from todo_store import open_store, parse_cursor, iter_ndjson, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 app = FastAPI(
     title="Step 5: TODO with Frontend",
@@ -46,11 +51,16 @@ class TodoResponse(BaseModel):
     completed: bool
     created_at: str
 
+class TodoPage(BaseModel):
+    """페이지 응답 - next_cursor 를 다음 요청의 cursor 로 전달 (마지막 페이지면 null)"""
+    items: list[TodoResponse]
+    next_cursor: Optional[str]
+
 # ============================================
-# 저장소
+# 저장소 - id 로 바로 찾는 딕셔너리 + 완료/미완료 인덱스 (../todo_store.py, TODO_STORAGE 환경변수)
+#   기본값은 메모리만 (재시작하면 비어있음), 영구 저장은 TODO_STORAGE=log, uvicorn --workers N 은 TODO_STORAGE=shared
 # ============================================
-todos_db = []
-next_id = 1
+todos_db = open_store('frontend')
 
 # ============================================
 # HTML 페이지 제공
@@ -67,36 +77,60 @@ def read_index():
 @app.post("/api/todos", response_model=TodoResponse, status_code=status.HTTP_201_CREATED)
 def create_todo(todo: TodoCreate):
     """TODO 추가"""
-    global next_id
-    
-    new_todo = {
-        "id": next_id,
-        "title": todo.title,
-        "description": todo.description,
-        "completed": False,
-        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
-    
-    todos_db.append(new_todo)
-    next_id += 1
+    new_todo = todos_db.create(title=todo.title, description=todo.description)
     
     print(f"[CREATE] TODO 추가: {new_todo['title']}")
     return new_todo
 
 
-@app.get("/api/todos", response_model=list[TodoResponse])
-def get_all_todos():
+# 전체 조회
+# limit/cursor 를 주면 페이지 단위 {items, next_cursor}  ex) /api/todos?limit=100  ->  /api/todos?limit=100&cursor=<next_cursor>
+# format=ndjson 이면 한 줄에 todo 하나씩 스트리밍 (전체 목록을 메모리에 만들지 않음)
+@app.get("/api/todos", response_model=Union[list[TodoResponse], TodoPage])
+def get_all_todos(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    format: str = "json"
+):
     """TODO 목록 조회"""
-    print(f"[READ] TODO 조회: {len(todos_db)}개")
-    return todos_db
+    if format not in ("json", "ndjson"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported format '{format}' (json | ndjson)"
+        )
+    try:
+        after = parse_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if format == "ndjson":
+        return StreamingResponse(iter_ndjson(todos_db, after, limit), media_type="application/x-ndjson")
+    if limit is None and cursor is None:
+        print(f"[READ] TODO 조회: {len(todos_db)}개")
+        return todos_db.all()
+    items, next_id = todos_db.page(after, limit or DEFAULT_PAGE_SIZE)
+    return {"items": items, "next_cursor": str(next_id) if next_id else None}
+
+
+# 완료/미완료 목록 - 저장소의 상태별 인덱스에서 바로 꺼냄 (전체 목록을 훑지 않음)
+# /api/todos/{todo_id} 와 경로 깊이가 달라서 순서는 상관없음
+@app.get("/api/todos/filter/completed", response_model=list[TodoResponse])
+def get_completed_todos():
+    """완료된 TODO 목록"""
+    return todos_db.filter(True)
+
+
+@app.get("/api/todos/filter/pending", response_model=list[TodoResponse])
+def get_pending_todos():
+    """미완료 TODO 목록"""
+    return todos_db.filter(False)
 
 
 @app.get("/api/todos/{todo_id}", response_model=TodoResponse)
 def get_todo(todo_id: int):
     """특정 TODO 조회"""
-    for todo in todos_db:
-        if todo["id"] == todo_id:
-            return todo
+    todo = todos_db.get(todo_id)
+    if todo is not None:
+        return todo
     
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
@@ -107,17 +141,11 @@ def get_todo(todo_id: int):
 @app.put("/api/todos/{todo_id}", response_model=TodoResponse)
 def update_todo(todo_id: int, todo_update: TodoUpdate):
     """TODO 수정"""
-    for todo in todos_db:
-        if todo["id"] == todo_id:
-            if todo_update.title is not None:
-                todo["title"] = todo_update.title
-            if todo_update.description is not None:
-                todo["description"] = todo_update.description
-            if todo_update.completed is not None:
-                todo["completed"] = todo_update.completed
-            
-            print(f"[UPDATE] TODO 수정: ID={todo_id}")
-            return todo
+    # 전달된 값만 변경
+    todo = todos_db.update(todo_id, **todo_update.model_dump(exclude_none=True))
+    if todo is not None:
+        print(f"[UPDATE] TODO 수정: ID={todo_id}")
+        return todo
     
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
@@ -128,11 +156,9 @@ def update_todo(todo_id: int, todo_update: TodoUpdate):
 @app.delete("/api/todos/{todo_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_todo(todo_id: int):
     """TODO 삭제"""
-    for index, todo in enumerate(todos_db):
-        if todo["id"] == todo_id:
-            todos_db.pop(index)
-            print(f"[DELETE] TODO 삭제: ID={todo_id}")
-            return
+    if todos_db.delete(todo_id):
+        print(f"[DELETE] TODO 삭제: ID={todo_id}")
+        return
     
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
@@ -142,16 +168,10 @@ def delete_todo(todo_id: int):
 
 @app.get("/api/health")
 def health_check():
-    """서버 상태 및 통계"""
-    total = len(todos_db)
-    completed = len([t for t in todos_db if t["completed"]])
-    pending = total - completed
-    
+    """서버 상태 및 통계 - 로드밸런서가 매초 호출하므로 목록을 세지 않고 저장소의 개수 사용 (O(1))"""
     return {
         "status": "healthy",
-        "total": total,
-        "completed": completed,
-        "pending": pending
+        **todos_db.stats()
     }
 
 
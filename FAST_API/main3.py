@@ -1,7 +1,8 @@
-from fastapi import FastAPI, HTTPException, status
+from fastapi import FastAPI, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel,Field
-from typing import Optional
-from datetime import datetime
+from typing import Optional, Union
+from todo_store import open_store, parse_cursor, iter_ndjson, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 app=FastAPI(
     title='todo crud basic',
@@ -34,9 +35,14 @@ class TodoResponse(BaseModel):
                 'created_at':'2025-12-22 14:30:00'
             }
         }
-# 글로벌 변수
-todos=[]
-next_id = 1
+class TodoPage(BaseModel):
+    '''페이지 응답 - next_cursor 를 다음 요청의 cursor 로 전달 (마지막 페이지면 null)'''
+    items:list[TodoResponse]
+    next_cursor:Optional[str]
+
+# 저장소 - id 로 바로 찾는 딕셔너리 (todo_store.py, TODO_STORAGE 환경변수)
+#   기본값은 메모리만 (재시작하면 비어있음), 영구 저장은 TODO_STORAGE=log, uvicorn --workers N 은 TODO_STORAGE=shared
+todos = open_store('main3')
 
 # 라우터
 @app.get('/')
@@ -57,35 +63,44 @@ def create_tod(todo:TodoCreate):
     :Returns:
         생성된 todo
     '''
-    global next_id
-
-    new_todo = {
-        'id':next_id,
-        'title':todo.title,
-        'completed':False,
-        'created_at':datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    }
-    #리스트에 추가
-    todos.append(new_todo)
-    #id증가
-    
-    next_id += 1
+    # 저장소에 추가 - id, completed, created_at 은 저장소가 채움
+    new_todo = todos.create(title=todo.title)
     return new_todo
 
 # 전체 조회
-@app.get('/todos', response_model=list[TodoResponse])
-def get_all_todos():
+# limit/cursor 를 주면 페이지 단위 {items, next_cursor}  ex) /todos?limit=100  ->  /todos?limit=100&cursor=<next_cursor>
+# format=ndjson 이면 한 줄에 todo 하나씩 스트리밍 (전체 목록을 메모리에 만들지 않음)
+@app.get('/todos', response_model=Union[list[TodoResponse], TodoPage])
+def get_all_todos(
+    limit:Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor:Optional[str] = None,
+    format:str = 'json'
+):
     '''모든 todo조회'''
-    return todos
+    if format not in ('json', 'ndjson'):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported format '{format}' (json | ndjson)"
+        )
+    try:
+        after = parse_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if format == 'ndjson':
+        return StreamingResponse(iter_ndjson(todos, after, limit), media_type='application/x-ndjson')
+    if limit is None and cursor is None:
+        return todos.all()
+    items, next_id = todos.page(after, limit or DEFAULT_PAGE_SIZE)
+    return {'items': items, 'next_cursor': str(next_id) if next_id else None}
 
 # id별로 조회 id값을 어떻게 전달?  경로, 쿼리
 @app.get('/todos/{id}', response_model=TodoResponse)
 # @app.get('/find_todos', response_model=TodoResponse)  # http://127.0.0.1:8080/todos?id=2
 def get_todo(id:int):
     '''특정 id로 찾기'''
-    for todo in todos:
-        if todo['id'] == id:
-            return todo
+    todo = todos.get(id)
+    if todo is not None:
+        return todo
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
         detail = f'id {id} 해당하는 데이터가 없습니다.'
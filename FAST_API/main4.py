@@ -1,7 +1,7 @@
 # CORS  Cross-Origin Resource Sharing
 # 다른도메인(프론트엔드)에서 api 호출 허용
 # post  /todos   추가
-# get   /todos   전체조회
+# get   /todos   전체조회  (?limit=&cursor= 페이지, ?format=ndjson 스트리밍)
 # post  /todos/{id}   개별조회
 # put  /todos/{id}   수정
 # delete  /todos/{id}   삭제
@@ -9,11 +9,13 @@
 # get  /todos/filter/pending   미완료목록
 # get  /health                통계
 # delete  /todos/clear/all    전체삭제
-from fastapi import FastAPI, HTTPException, status
+from fastapi import FastAPI, HTTPException, Query, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel,Field
-from typing import Optional
+from typing import Optional, Union
 from datetime import datetime
+from todo_store import open_store, parse_cursor, iter_ndjson, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 app=FastAPI(
     title='todo crud',
@@ -49,9 +51,14 @@ class TodoUpdate(BaseModel):
     description:Optional[str] = Field(None,max_length=500)
     completed:Optional[bool] = None    
 
-# 저장소
-todos_db = []
-next_id = 0
+class TodoPage(BaseModel):
+    '''페이지 응답 - next_cursor 를 다음 요청의 cursor 로 전달 (마지막 페이지면 null)'''
+    items:list[TodoResponse]
+    next_cursor:Optional[str]
+
+# 저장소 - id 로 바로 찾는 딕셔너리 + 완료/미완료 인덱스 (todo_store.py, TODO_STORAGE 환경변수)
+#   기본값은 메모리만 (재시작하면 비어있음), 영구 저장은 TODO_STORAGE=log, uvicorn --workers N 은 TODO_STORAGE=shared
+todos_db = open_store('main4')
 
 # api 앤드포인트
 @app.get('/')
@@ -69,31 +76,64 @@ def create_todo(todo:TodoCreate):
         'description':'할일 설명 -선택' 
     }
     '''
-    global next_id
-    next_id += 1
-    new_data = TodoResponse(
-        id=next_id,
+    new_data = todos_db.create(
         title=todo.title,
         description=todo.descriprion,
-        completed=False,
+        modified_at=None,
     )
     print(f'new_data : {new_data}')
-    todos_db.append(new_data)
     return new_data
 
 # 전체 조회
-@app.get('/todos', response_model=list[TodoResponse])
-def get_all_todos():
+# limit/cursor 를 주면 페이지 단위 {items, next_cursor}  ex) /todos?limit=100  ->  /todos?limit=100&cursor=<next_cursor>
+# format=ndjson 이면 한 줄에 todo 하나씩 스트리밍 (전체 목록을 메모리에 만들지 않음)
+@app.get('/todos', response_model=Union[list[TodoResponse], TodoPage])
+def get_all_todos(
+    limit:Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor:Optional[str] = None,
+    format:str = 'json'
+):
     '''모든 데이터 조회'''
-    return todos_db
+    if format not in ('json', 'ndjson'):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported format '{format}' (json | ndjson)"
+        )
+    try:
+        after = parse_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if format == 'ndjson':
+        return StreamingResponse(iter_ndjson(todos_db, after, limit), media_type='application/x-ndjson')
+    if limit is None and cursor is None:
+        return todos_db.all()
+    items, next_id = todos_db.page(after, limit or DEFAULT_PAGE_SIZE)
+    return {'items': items, 'next_cursor': str(next_id) if next_id else None}
+
+# 완료/미완료 목록 - 저장소의 상태별 인덱스 사용
+@app.get('/todos/filter/completed', response_model=list[TodoResponse])
+def get_completed_todos():
+    '''완료 목록'''
+    return todos_db.filter(True)
+
+@app.get('/todos/filter/pending', response_model=list[TodoResponse])
+def get_pending_todos():
+    '''미완료 목록'''
+    return todos_db.filter(False)
+
+# 통계 - 개수는 저장소가 추가/수정/삭제 때마다 갱신 (O(1))
+@app.get('/health')
+def health():
+    '''통계'''
+    return {'status': 'healthy', **todos_db.stats()}
 
 # 아이디별 데이터 조회
 @app.get('/todos/{id}',response_model=TodoResponse)
 def get_tody_byid(id:int):
     '''아이디로 조회'''
-    for todo in todos_db:
-        if todo.id == id:
-            return todo
+    todo = todos_db.get(id)
+    if todo is not None:
+        return todo
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
         detail=f'{id}를 찾을수 없습니다.'
@@ -102,26 +142,16 @@ def get_tody_byid(id:int):
 @app.put('/todos/{id}',response_model=TodoResponse)
 def update_todo(id:int, update_data:TodoUpdate):
     '''수정'''
-    # 목록에서 id에 해당하는 요소를 찾아서 값을 변경
-    get_tody_byid(id)    
-    for todo in todos_db:
-        if todo.id == id:
-            print(f'수정 {update_data}')            
-            todo.modified_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            if update_data.title is not None:
-                todo.title = update_data.title
-            if update_data.description is not None:
-                todo.description = update_data.description
-            if update_data.completed is not None:
-                todo.completed = update_data.completed                
-            return todo
+    # 저장소에서 id에 해당하는 요소를 찾아서 값을 변경 (전달된 값만)
+    print(f'수정 {update_data}')
+    changes = update_data.model_dump(exclude_none=True)
+    todo = todos_db.update(id, **changes, modified_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    if todo is None:
+        get_tody_byid(id)   # 404
+    return todo
 # 삭제
 @app.delete('/todos/{id}',status_code=status.HTTP_204_NO_CONTENT)
 def delete_todo(id:int):
     '''삭제'''
-    get_tody_byid(id)
-
-    for index, todo in enumerate(todos_db):
-        if todo.id == id:
-            todos_db.pop(index)
-            return
\ No newline at end of file
+    if not todos_db.delete(id):
+        get_tody_byid(id)   # 404
\ No newline at end of file
@@ -0,0 +1,184 @@
+# 여러 워커(프로세스)가 같이 쓰는 todo 저장소 - uvicorn main4:app --workers 4
+# TodoStore(todo_store.py) 는 프로세스 메모리에 상태를 두므로 워커마다 목록이 다르고 id 가 겹침
+# SharedTodoStore 는 메모리에 두지 않고 매 요청 SQLite 파일 하나를 직접 읽고 씀
+#   - id 할당 : INTEGER PRIMARY KEY AUTOINCREMENT - 쓰기 트랜잭션 안에서 SQLite 가 정하므로 워커끼리 겹치지 않음
+#               삭제한 id 도 다시 쓰지 않음 (TodoStore 와 같음)
+#   - 수정    : BEGIN IMMEDIATE 로 쓰기 잠금을 먼저 잡고 읽고-합치고-저장 -> 다른 워커의 수정이 끼어들지 않음
+#   - 개수    : todo_counts 테이블을 트리거가 갱신 - stats() 는 두 행만 읽음 O(1)
+#   - 완료/미완료 목록, 페이지 : (completed, id) 인덱스 / id 기본키 사용
+# WAL 모드 - 읽기는 쓰기를 기다리지 않음, 쓰기끼리는 busy_timeout 동안 순서대로 대기
+# TodoStore 와 같은 메서드를 제공하므로 라우터 코드는 그대로 (open_store 에서 TODO_STORAGE=shared 로 선택)
+#
+# 확인 : python check_multiworker.py  (워커 여러개를 띄우고 동시에 요청)
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional
+
+SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS todos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        completed INTEGER NOT NULL DEFAULT 0,
+        data TEXT NOT NULL
+    )''',
+    'CREATE INDEX IF NOT EXISTS ix_todos_completed_id ON todos (completed, id)',
+    'CREATE TABLE IF NOT EXISTS todo_counts (completed INTEGER PRIMARY KEY, count INTEGER NOT NULL)',
+    'INSERT OR IGNORE INTO todo_counts (completed, count) VALUES (0, 0), (1, 0)',
+    '''CREATE TRIGGER IF NOT EXISTS todos_count_ai AFTER INSERT ON todos BEGIN
+        UPDATE todo_counts SET count = count + 1 WHERE completed = new.completed;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS todos_count_ad AFTER DELETE ON todos BEGIN
+        UPDATE todo_counts SET count = count - 1 WHERE completed = old.completed;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS todos_count_au AFTER UPDATE OF completed ON todos
+    WHEN old.completed != new.completed BEGIN
+        UPDATE todo_counts SET count = count - 1 WHERE completed = old.completed;
+        UPDATE todo_counts SET count = count + 1 WHERE completed = new.completed;
+    END''',
+)
+
+
+def _row_to_todo(row) -> dict:
+    todo_id, completed, data = row
+    return {'id': todo_id, 'completed': bool(completed), **json.loads(data)}
+
+
+class SharedTodoStore:
+    '''SQLite 파일 하나를 여러 프로세스가 같이 쓰는 todo 저장소 (TodoStore 와 같은 메서드)'''
+    def __init__(self, path, sync: str = 'batch', busy_timeout: float = 30.0):
+        self.path = str(path)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        # batch : commit 마다 fsync (응답 전에 디스크 반영), async : WAL 에서 checkpoint 때만 fsync (프로세스가 죽어도 유지)
+        self.synchronous = 'FULL' if sync == 'batch' else 'NORMAL'
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()   # sqlite3 연결은 스레드마다 따로 (sync 라우터는 스레드풀에서 실행)
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        conn = self._conn()
+        with conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # isolation_level=None - 트랜잭션은 BEGIN 으로 직접 시작
+            # check_same_thread=False - 사용은 만든 스레드에서만, close() 에서 한번에 닫기 위해서만 허용
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(f'PRAGMA synchronous={self.synchronous}')
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def create(self, **fields) -> dict:
+        '''새 todo 추가 - id, completed(False), created_at 은 저장소가 채움'''
+        fields.pop('id', None)
+        completed = bool(fields.pop('completed', False))
+        data = {'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'), **fields}
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            cursor = conn.execute('INSERT INTO todos (completed, data) VALUES (?, ?)',
+                                  (int(completed), json.dumps(data, ensure_ascii=False)))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return {'id': cursor.lastrowid, 'completed': completed, **data}
+
+    def get(self, todo_id: int) -> Optional[dict]:
+        '''id 로 조회 - 없으면 None'''
+        row = self._conn().execute('SELECT id, completed, data FROM todos WHERE id = ?', (todo_id,)).fetchone()
+        return _row_to_todo(row) if row else None
+
+    def update(self, todo_id: int, **changes) -> Optional[dict]:
+        '''전달한 필드만 변경 - 없으면 None'''
+        changes.pop('id', None)
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')   # 읽기 전에 쓰기 잠금 - 읽은 값과 저장하는 값 사이에 다른 워커가 끼어들지 않음
+        try:
+            row = conn.execute('SELECT id, completed, data FROM todos WHERE id = ?', (todo_id,)).fetchone()
+            if row is None:
+                conn.execute('ROLLBACK')
+                return None
+            todo = {**_row_to_todo(row), **changes}
+            data = {key: value for key, value in todo.items() if key not in ('id', 'completed')}
+            conn.execute('UPDATE todos SET completed = ?, data = ? WHERE id = ?',
+                         (int(todo['completed']), json.dumps(data, ensure_ascii=False), todo_id))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return todo
+
+    def delete(self, todo_id: int) -> bool:
+        '''삭제 - 없었으면 False'''
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            deleted = conn.execute('DELETE FROM todos WHERE id = ?', (todo_id,)).rowcount
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return deleted > 0
+
+    def all(self) -> list:
+        '''전체 목록 (추가한 순서 = id 순)'''
+        return [_row_to_todo(row) for row in self._conn().execute('SELECT id, completed, data FROM todos ORDER BY id')]
+
+    def filter(self, completed: bool) -> list:
+        '''완료(True)/미완료(False) 목록 - (completed, id) 인덱스'''
+        rows = self._conn().execute(
+            'SELECT id, completed, data FROM todos WHERE completed = ? ORDER BY id', (int(completed),))
+        return [_row_to_todo(row) for row in rows]
+
+    def page(self, after: int = 0, limit: int = 100):
+        '''id 가 after 보다 큰 todo 를 limit 개 -> (목록, 다음 커서 - 마지막 페이지면 None)'''
+        rows = self._conn().execute(
+            'SELECT id, completed, data FROM todos WHERE id > ? ORDER BY id LIMIT ?', (after, limit + 1)).fetchall()
+        items = [_row_to_todo(row) for row in rows[:limit]]
+        return items, (items[-1]['id'] if len(rows) > limit else None)
+
+    def iter_all(self, after: int = 0, batch: int = 500) -> Iterator[dict]:
+        '''after 이후 전체를 batch 개씩 조회하면서 하나씩 반환'''
+        while after is not None:
+            items, after = self.page(after, batch)
+            yield from items
+
+    def stats(self) -> dict:
+        '''전체/완료/미완료 개수 - 트리거가 갱신하는 todo_counts 에서 읽음 O(1)'''
+        counts = dict(self._conn().execute('SELECT completed, count FROM todo_counts'))
+        return {
+            'total': counts[0] + counts[1],
+            'completed': counts[1],
+            'pending': counts[0],
+        }
+
+    def clear(self) -> int:
+        '''전체 삭제 - 삭제한 개수 반환 (id 는 이어서 증가)'''
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            count = conn.execute('DELETE FROM todos').rowcount
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return count
+
+    def close(self):
+        '''모든 스레드의 연결 종료'''
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def __len__(self) -> int:
+        return self.stats()['total']
@@ -0,0 +1,339 @@
+# todo 저장소 백엔드 - 재시작해도 todo 가 남도록 디스크에 기록
+#
+# TodoStore(todo_store.py) 는 계속 메모리의 딕셔너리/인덱스로 요청을 처리하고 바뀐 내용만 백엔드에 기록
+# 시작할 때 load() 로 메모리 상태를 복원
+#
+# LogBackend (기본값) : 추가 전용 로그(write-ahead log) + 스냅샷
+#   <경로>/log.<번호>.jsonl  변경 한 건당 JSON 한 줄  {"op": "put", "todo": {...}} / {"op": "del", "id": 1} / {"op": "clear"}
+#   <경로>/snapshot.json     어느 시점의 전체 상태 + 이어서 읽을 로그 번호
+#   로그가 compact_every 건 쌓이면 새 로그 파일로 넘어가고, 그 시점의 상태를 백그라운드 스레드에서 스냅샷으로 저장
+#   스냅샷 저장이 끝나면 이전 로그 파일 삭제 -> 시작할 때 읽는 양은 스냅샷 + 로그 compact_every 건 정도
+#   마지막 줄이 쓰다 만 줄이면(기록 도중 종료) 무시
+# SQLiteBackend (선택) : id -> todo JSON 테이블 하나 (WAL 모드) - 별도 압축 불필요
+#
+# fsync 묶음 처리 (group commit)
+#   요청마다 fsync 하면 디스크 동기화 시간(수 ms)이 요청마다 더해짐
+#   기록은 큐에 넣고 전용 스레드가 모인 기록을 한번에 쓰고 fsync(commit) 한번
+#   fsync 하는 동안 들어온 기록은 큐에 모여서 다음 fsync 에 같이 반영 - 동시 요청이 많을수록 많이 묶임
+#   flush_interval 을 주면 쓰기 전에 그만큼 더 기다려서 더 많이 묶음 (요청 지연은 늘어남)
+#   sync='batch' : 요청은 자기 기록이 fsync 될 때까지 기다림 - 응답을 받은 변경은 유실되지 않음 (기본값)
+#   sync='async' : 기다리지 않음 - 더 빠르지만 비정상 종료시 아직 쓰지 못한 변경 유실 가능
+#
+# 프로세스 하나 전용 - 메모리 상태를 프로세스마다 따로 가지므로 uvicorn --workers 2 이상이면 데이터가 갈라짐
+#   데이터마다 잠금 파일을 잡아서 두번째 프로세스는 시작할 때 실패 -> 여러 워커는 TODO_STORAGE=shared (todo_shared.py)
+# 속도 비교 : python bench_todo_store.py
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+try:
+    import fcntl
+except ImportError:   # 윈도우 - 잠금 없이 사용
+    fcntl = None
+
+SYNC_MODES = ('batch', 'async')
+
+
+def _lock_process(path):
+    '''path 잠금 파일을 이 프로세스만 사용하도록 잠금 - 다른 프로세스가 잡고 있으면 RuntimeError'''
+    handle = open(path, 'a')
+    if fcntl is not None:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            raise RuntimeError(
+                f'{path} is locked by another process - use TODO_STORAGE=shared to run several workers')
+    return handle
+
+
+class _GroupCommit:
+    '''기록 큐 + 묶어서 쓰는 전용 스레드 - 실제 쓰기는 하위 클래스의 _flush(records)'''
+    def __init__(self, sync: str, flush_interval: float):
+        if sync not in SYNC_MODES:
+            raise ValueError(f"unknown sync mode '{sync}' ({' | '.join(SYNC_MODES)})")
+        self.sync = sync
+        self.flush_interval = flush_interval
+        self._queue = []
+        self._seq = 0          # 마지막으로 받은 기록 번호
+        self._durable = 0      # 디스크 반영(fsync)까지 끝난 기록 번호
+        self._error = None     # 쓰기 실패 - 이후 기록은 모두 실패 처리 (메모리와 디스크가 달라졌으므로)
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name=f'{type(self).__name__}-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)   # 종료시 남은 기록 저장
+
+    def append(self, record: dict) -> int:
+        '''기록을 큐에 넣고 번호 반환 - TodoStore 의 lock 안에서 호출되므로 순서가 변경 순서와 같음'''
+        with self._cond:
+            if self._error is not None:
+                raise self._error
+            if self._closed:
+                raise RuntimeError('todo storage is closed')
+            self._queue.append(record)
+            self._seq += 1
+            self._cond.notify_all()
+            return self._seq
+
+    def wait(self, seq: int):
+        '''sync='batch' 이면 seq 번 기록이 디스크에 반영될 때까지 대기 (TodoStore 의 lock 밖에서 호출)'''
+        if self.sync != 'batch':
+            return
+        with self._cond:
+            while self._durable < seq and self._error is None:
+                self._cond.wait()
+            if self._durable < seq:
+                raise self._error
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                closed = self._closed
+            if self.flush_interval and not closed:
+                time.sleep(self.flush_interval)   # 다른 요청의 기록이 더 모이도록 잠깐 기다림
+            with self._cond:
+                records, self._queue = self._queue, []
+                seq = self._seq
+            try:
+                self._flush(records)
+            except Exception as e:
+                print(f'[todo storage] write failed: {e!r}')
+                with self._cond:
+                    self._error = e
+                    self._cond.notify_all()
+                return
+            with self._cond:
+                self._durable = seq
+                self._cond.notify_all()
+
+    def close(self):
+        '''남은 기록을 저장하고 종료 (여러번 호출해도 됨)'''
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        self._close()
+
+    def should_compact(self) -> bool:
+        return False
+
+    def compact(self, todos: list, next_id: int):
+        pass
+
+    def _flush(self, records: list):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+
+class LogBackend(_GroupCommit):
+    '''추가 전용 로그 + 스냅샷 (디렉토리 하나)'''
+    SNAPSHOT = 'snapshot.json'
+
+    def __init__(self, path, sync: str = 'batch', flush_interval: float = 0.0, compact_every: int = 100000):
+        super().__init__(sync, flush_interval)
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._process_lock = _lock_process(self.path / 'lock')
+        self.compact_every = compact_every
+        self._since_snapshot = 0
+        self._compacting = False
+        self._snapshot_thread = None
+        segments = self._segments()
+        self._segment = max(segments + [self._snapshot_log()])
+        self._file = self._open_segment(self._segment)
+        self._start()
+
+    def _segment_path(self, number: int) -> Path:
+        return self.path / f'log.{number:06d}.jsonl'
+
+    def _segments(self) -> list:
+        '''로그 파일 번호 (오름차순)'''
+        return sorted(int(p.name.split('.')[1]) for p in self.path.glob('log.*.jsonl'))
+
+    def _snapshot_log(self) -> int:
+        '''스냅샷 이후 이어서 읽을 로그 번호 - 스냅샷이 없으면 0'''
+        snapshot = self.path / self.SNAPSHOT
+        if not snapshot.exists():
+            return 0
+        with open(snapshot, 'rb') as f:
+            return json.load(f)['log']
+
+    def _open_segment(self, number: int):
+        path = self._segment_path(number)
+        if path.exists():
+            # 쓰다 만 마지막 줄은 잘라냄 - 그대로 이어 쓰면 다음 기록과 한 줄로 붙어버림
+            with open(path, 'rb+') as f:
+                data = f.read()
+                if data and not data.endswith(b'\n'):
+                    f.truncate(data.rfind(b'\n') + 1)
+        return open(path, 'ab')
+
+    def load(self):
+        '''스냅샷 + 이후 로그 재생 -> (추가한 순서의 todo 목록, 다음 id)'''
+        todos = {}
+        next_id = 1
+        first = 0
+        snapshot = self.path / self.SNAPSHOT
+        if snapshot.exists():
+            with open(snapshot, 'rb') as f:
+                data = json.load(f)
+            next_id = data['next_id']
+            first = data['log']
+            todos = {todo['id']: todo for todo in data['todos']}
+        replayed = 0
+        for number in self._segments():
+            if number < first:
+                continue
+            with open(self._segment_path(number), 'rb') as f:
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break   # 쓰다 만 마지막 줄
+                    record = json.loads(line)
+                    if record['op'] == 'put':
+                        todo = record['todo']
+                        todos[todo['id']] = todo   # 이미 있는 id 면 순서 유지
+                        next_id = max(next_id, todo['id'] + 1)
+                    elif record['op'] == 'del':
+                        todos.pop(record['id'], None)
+                    elif record['op'] == 'clear':
+                        todos.clear()
+                    replayed += 1
+        self._since_snapshot = replayed
+        return list(todos.values()), next_id
+
+    def append(self, record: dict) -> int:
+        seq = super().append(record)
+        self._since_snapshot += 1
+        return seq
+
+    def should_compact(self) -> bool:
+        return self._since_snapshot >= self.compact_every and not self._compacting
+
+    def compact(self, todos: list, next_id: int):
+        '''새 로그 파일로 넘어가고 현재 상태를 스냅샷으로 저장 (TodoStore 의 lock 안에서 호출)
+
+        todos 의 각 todo 는 이후에 수정되지 않음 (TodoStore 는 수정할 때 새 딕셔너리로 교체)
+        '''
+        self._compacting = True
+        self._since_snapshot = 0
+        super().append({'op': 'rotate', 'todos': todos, 'next_id': next_id})
+
+    def _flush(self, records: list):
+        lines = []
+        for record in records:
+            if record['op'] == 'rotate':
+                # 여기까지의 기록은 현재 파일에, 이후 기록은 새 파일에
+                self._write(lines)
+                lines = []
+                self._file.close()
+                self._segment += 1
+                self._file = self._open_segment(self._segment)
+                self._snapshot_thread = threading.Thread(
+                    target=self._write_snapshot, args=(record['todos'], record['next_id'], self._segment),
+                    name='LogBackend-snapshot', daemon=True)
+                self._snapshot_thread.start()
+            else:
+                lines.append(json.dumps(record, ensure_ascii=False).encode() + b'\n')
+        self._write(lines)
+
+    def _write(self, lines: list):
+        if not lines:
+            return
+        self._file.write(b''.join(lines))
+        self._file.flush()
+        os.fsync(self._file.fileno())   # 모인 기록 전체에 fsync 한번
+
+    def _write_snapshot(self, todos: list, next_id: int, segment: int):
+        '''임시 파일에 쓰고 fsync 후 교체 - 중간에 종료되어도 이전 스냅샷 + 로그가 남아있음'''
+        try:
+            temp = self.path / (self.SNAPSHOT + '.tmp')
+            with open(temp, 'w', encoding='utf-8') as f:
+                json.dump({'next_id': next_id, 'log': segment, 'todos': todos}, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp, self.path / self.SNAPSHOT)
+            if hasattr(os, 'O_DIRECTORY'):   # 파일 이름 교체까지 디스크에 반영 (윈도우는 지원 안함)
+                fd = os.open(self.path, os.O_RDONLY | os.O_DIRECTORY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            for number in self._segments():
+                if number < segment:
+                    self._segment_path(number).unlink()
+        except OSError as e:
+            print(f'[todo storage] snapshot failed: {e!r}')   # 로그가 남아있으므로 다음에 다시 시도
+        finally:
+            self._compacting = False
+
+    def _close(self):
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join()
+        self._file.close()
+        self._process_lock.close()
+
+
+class SQLiteBackend(_GroupCommit):
+    '''SQLite 파일 하나 - todos(id, data JSON) + meta(next_id)'''
+    def __init__(self, path, sync: str = 'batch', flush_interval: float = 0.0):
+        super().__init__(sync, flush_interval)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._process_lock = _lock_process(f'{path}.lock')
+        # 쓰기는 전용 스레드에서만 하므로 연결 하나를 공유
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=FULL')   # commit 마다 fsync - commit 은 묶음당 한번
+        self._conn.execute('CREATE TABLE IF NOT EXISTS todos (id INTEGER PRIMARY KEY, data TEXT NOT NULL)')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+        self._start()
+
+    def load(self):
+        '''-> (추가한 순서(id 순)의 todo 목록, 다음 id)'''
+        todos = [json.loads(data) for data, in self._conn.execute('SELECT data FROM todos ORDER BY id')]
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'next_id'").fetchone()
+        return todos, row[0] if row else 1
+
+    def _flush(self, records: list):
+        next_id = 0
+        self._conn.execute('BEGIN')
+        try:
+            for record in records:
+                if record['op'] == 'put':
+                    todo = record['todo']
+                    self._conn.execute(
+                        'INSERT INTO todos (id, data) VALUES (?, ?) ON CONFLICT(id) DO UPDATE SET data = excluded.data',
+                        (todo['id'], json.dumps(todo, ensure_ascii=False)))
+                    next_id = max(next_id, todo['id'] + 1)
+                elif record['op'] == 'del':
+                    self._conn.execute('DELETE FROM todos WHERE id = ?', (record['id'],))
+                elif record['op'] == 'clear':
+                    self._conn.execute('DELETE FROM todos')
+            if next_id:
+                # 마지막 todo 를 삭제해도 id 를 다시 쓰지 않도록 다음 id 를 따로 보관
+                self._conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('next_id', ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = max(value, excluded.value)", (next_id,))
+            self._conn.execute('COMMIT')
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+
+    def _close(self):
+        self._conn.close()
+        self._process_lock.close()
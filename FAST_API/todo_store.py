@@ -0,0 +1,243 @@
+# todo 저장소 - main3.py, main4.py, frontend/main.py 에서 같이 사용
+# 리스트에 저장하면 id 로 찾을 때마다 처음부터 끝까지 확인(O(n))하고
+# pop(index) 는 뒤쪽 요소를 모두 한칸씩 당겨야 함 -> todo 가 많아질수록 느려짐
+#
+# id -> todo 딕셔너리 하나에 저장 (딕셔너리는 추가한 순서를 유지)
+#   - 조회/수정/삭제 : O(1)
+#   - 전체 목록      : 추가한 순서 그대로
+# 완료/미완료 id 를 따로 보관(인덱스)해서 필터 목록을 전체를 훑지 않고 만듦
+#   completed 값이 바뀌면 인덱스도 같이 옮김
+#   추가/수정/삭제 때마다 인덱스가 갱신되므로 개수(stats)는 인덱스 크기 - 매번 세지 않음 O(1)
+# 페이지 조회 (page / iter_ndjson) - 커서는 이전 페이지 마지막 id
+#   id 는 계속 증가하므로 추가한 순서 = id 오름차순 -> id 목록(_order)에서 bisect 로 커서 위치를 바로 찾음
+#   삭제된 id 는 목록에 남겨두고 건너뜀, 절반 이상이 삭제된 id 가 되면 목록을 다시 만듦
+#
+# sync 라우터(def)는 스레드풀에서 동시에 실행되므로 모든 동작을 lock 안에서 처리
+# 반환값은 복사본 - 받은 쪽에서 수정해도 저장소/인덱스가 어긋나지 않음 (수정은 update 로)
+#
+# 영구 저장 (todo_storage.py) - 켜면 재시작해도 todo 유지 (기본값은 메모리만 - 디스크에 아무것도 쓰지 않음)
+#   변경 내용을 백엔드에 기록하고 시작할 때 복원, 요청 처리는 계속 메모리에서
+#   저장된 todo 딕셔너리는 수정하지 않고 새 딕셔너리로 교체 -> 백엔드가 lock 없이 나중에 저장해도 안전
+#   환경변수로 선택 (open_store)
+#     TODO_STORAGE=memory (기본값) | log | sqlite | shared
+#       memory/log/sqlite 는 프로세스 하나 기준 - uvicorn --workers 2 이상이면 워커마다 목록이 따로 (log/sqlite 는 잠금 파일 때문에 시작 실패)
+#       shared : uvicorn --workers N 처럼 여러 프로세스가 SQLite 파일 하나를 같이 사용 (todo_shared.py)
+#     TODO_DATA_DIR=FAST_API/todo_data   앱마다 <이름> 디렉토리/파일
+#     TODO_SYNC=batch (응답 전에 디스크 반영, 기본값) | async
+#     TODO_FLUSH_INTERVAL=0              fsync 전에 기록을 더 모으는 시간(초), 0 이면 fsync 중에 모인 만큼만 묶음
+#     TODO_COMPACT_EVERY=100000          로그가 이만큼 쌓이면 스냅샷 (log 백엔드)
+import json
+import os
+import threading
+from bisect import bisect_right
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional
+from todo_shared import SharedTodoStore
+from todo_storage import LogBackend, SQLiteBackend
+
+TODO_STORAGE = os.getenv('TODO_STORAGE', 'memory')
+TODO_DATA_DIR = os.getenv('TODO_DATA_DIR', str(Path(__file__).resolve().parent / 'todo_data'))
+TODO_SYNC = os.getenv('TODO_SYNC', 'batch')
+TODO_FLUSH_INTERVAL = float(os.getenv('TODO_FLUSH_INTERVAL', 0))
+TODO_COMPACT_EVERY = int(os.getenv('TODO_COMPACT_EVERY', 100000))
+
+# 페이지 크기 기본값/최대값, NDJSON 스트리밍에서 lock 을 한번 잡고 꺼내는 개수
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
+
+
+class TodoStore:
+    '''id 로 바로 찾는 todo 저장소
+
+    store = TodoStore()                         # 메모리만
+    store = TodoStore(backend=LogBackend(경로))  # 기록 + 시작할 때 복원
+    todo = store.create(title='할일', description=None)
+    store.update(todo['id'], completed=True)
+    store.delete(todo['id'])
+    '''
+    def __init__(self, start_id: int = 1, backend=None):
+        self._todos = {}        # id -> todo (추가한 순서)
+        self._completed = {}    # 완료된 id (값은 사용하지 않음 - 순서가 있는 set 으로 사용)
+        self._pending = {}      # 미완료 id
+        self._order = []        # id 오름차순 (삭제된 id 포함, page 에서 건너뜀)
+        self._removed = 0       # _order 에 남아있는 삭제된 id 수
+        self._next_id = start_id
+        self._lock = threading.RLock()
+        self._backend = backend
+        if backend is not None:
+            todos, next_id = backend.load()
+            for todo in todos:
+                self._todos[todo['id']] = todo
+                self._index(todo['completed'])[todo['id']] = None
+            self._order = list(self._todos)
+            self._next_id = max(start_id, next_id)
+
+    def _index(self, completed: bool) -> dict:
+        return self._completed if completed else self._pending
+
+    def _record(self, record: dict) -> int:
+        '''변경 내용을 백엔드 큐에 넣음 (lock 안에서 - 변경 순서대로 기록됨)'''
+        if self._backend is None:
+            return 0
+        seq = self._backend.append(record)
+        if self._backend.should_compact():
+            self._backend.compact(list(self._todos.values()), self._next_id)
+        return seq
+
+    def _wait(self, seq: int):
+        '''기록이 디스크에 반영될 때까지 대기 (lock 밖에서 - 다른 요청과 fsync 를 같이 함)'''
+        if seq:
+            self._backend.wait(seq)
+
+    def create(self, **fields) -> dict:
+        '''새 todo 추가 - id, completed(False), created_at 은 저장소가 채움'''
+        with self._lock:
+            todo = {
+                'id': self._next_id,
+                'completed': False,
+                'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                **fields,
+            }
+            todo['id'] = self._next_id   # fields 에 id 가 있어도 저장소가 정한 값 사용
+            self._next_id += 1
+            self._todos[todo['id']] = todo
+            self._index(todo['completed'])[todo['id']] = None
+            self._order.append(todo['id'])
+            seq = self._record({'op': 'put', 'todo': todo})
+        self._wait(seq)
+        return dict(todo)
+
+    def get(self, todo_id: int) -> Optional[dict]:
+        '''id 로 조회 - 없으면 None'''
+        with self._lock:
+            todo = self._todos.get(todo_id)
+            return dict(todo) if todo is not None else None
+
+    def update(self, todo_id: int, **changes) -> Optional[dict]:
+        '''전달한 필드만 변경 - 없으면 None'''
+        with self._lock:
+            todo = self._todos.get(todo_id)
+            if todo is None:
+                return None
+            changes.pop('id', None)   # id 는 변경 불가
+            if 'completed' in changes and changes['completed'] != todo['completed']:
+                del self._index(todo['completed'])[todo_id]
+                self._index(changes['completed'])[todo_id] = None
+            todo = {**todo, **changes}   # 새 딕셔너리로 교체 (이미 있는 키라서 순서는 유지)
+            self._todos[todo_id] = todo
+            seq = self._record({'op': 'put', 'todo': todo})
+        self._wait(seq)
+        return dict(todo)
+
+    def delete(self, todo_id: int) -> bool:
+        '''삭제 - 없었으면 False'''
+        with self._lock:
+            todo = self._todos.pop(todo_id, None)
+            if todo is None:
+                return False
+            del self._index(todo['completed'])[todo_id]
+            self._removed += 1
+            if self._removed > len(self._order) // 2:
+                self._order = list(self._todos)
+                self._removed = 0
+            seq = self._record({'op': 'del', 'id': todo_id})
+        self._wait(seq)
+        return True
+
+    def all(self) -> list:
+        '''전체 목록 (추가한 순서)'''
+        with self._lock:
+            return [dict(todo) for todo in self._todos.values()]
+
+    def filter(self, completed: bool) -> list:
+        '''완료(True)/미완료(False) 목록 - 인덱스의 id 만 확인 (추가한 순서)'''
+        with self._lock:
+            return [dict(self._todos[todo_id]) for todo_id in self._index(completed)]
+
+    def page(self, after: int = 0, limit: int = DEFAULT_PAGE_SIZE):
+        '''id 가 after 보다 큰 todo 를 limit 개 (추가한 순서) -> (목록, 다음 커서 - 마지막 페이지면 None)'''
+        with self._lock:
+            items = []
+            position = bisect_right(self._order, after)
+            # limit 보다 하나 더 찾아서 다음 페이지가 있는지 확인
+            while position < len(self._order) and len(items) <= limit:
+                todo = self._todos.get(self._order[position])
+                position += 1
+                if todo is not None:
+                    items.append(dict(todo))
+        if len(items) > limit:
+            items = items[:limit]
+            return items, items[-1]['id']
+        return items, None
+
+    def iter_all(self, after: int = 0, batch: int = STREAM_BATCH_SIZE) -> Iterator[dict]:
+        '''after 이후 전체를 batch 개씩 꺼내면서 하나씩 반환 - lock 은 batch 마다 잠깐만 잡음'''
+        while after is not None:
+            items, after = self.page(after, batch)
+            yield from items
+
+    def stats(self) -> dict:
+        '''전체/완료/미완료 개수 - O(1) (헬스 체크처럼 자주 호출해도 todo 수와 상관없음)'''
+        with self._lock:
+            return {
+                'total': len(self._todos),
+                'completed': len(self._completed),
+                'pending': len(self._pending),
+            }
+
+    def clear(self) -> int:
+        '''전체 삭제 - 삭제한 개수 반환 (id 는 이어서 증가)'''
+        with self._lock:
+            count = len(self._todos)
+            self._todos.clear()
+            self._completed.clear()
+            self._pending.clear()
+            self._order.clear()
+            self._removed = 0
+            seq = self._record({'op': 'clear'})
+        self._wait(seq)
+        return count
+
+    def close(self):
+        '''남은 기록 저장 후 백엔드 종료'''
+        if self._backend is not None:
+            self._backend.close()
+
+    def __len__(self) -> int:
+        return len(self._todos)
+
+
+def parse_cursor(cursor: Optional[str]) -> int:
+    '''커서 문자열 -> 이전 페이지 마지막 id (빈 값이면 처음부터), 잘못된 값은 ValueError'''
+    if not cursor:
+        return 0
+    if not cursor.isdigit():
+        raise ValueError(f"invalid cursor '{cursor}'")
+    return int(cursor)
+
+
+def iter_ndjson(store: TodoStore, after: int = 0, limit: Optional[int] = None) -> Iterator[str]:
+    '''NDJSON 한 줄씩 - 전체 목록을 만들지 않고 저장소에서 꺼내는 대로 직렬화 (StreamingResponse 용)'''
+    for count, todo in enumerate(store.iter_all(after), 1):
+        yield json.dumps(todo, ensure_ascii=False) + '\n'
+        if count == limit:
+            return
+
+
+def open_store(name: str):
+    '''환경변수 설정(TODO_STORAGE ...)으로 저장소 생성 - name 은 앱별 데이터 이름 (ex. 'main4')'''
+    if TODO_STORAGE == 'memory':
+        return TodoStore()
+    if TODO_STORAGE == 'shared':
+        return SharedTodoStore(os.path.join(TODO_DATA_DIR, f'{name}.shared.sqlite3'), sync=TODO_SYNC)
+    if TODO_STORAGE == 'sqlite':
+        backend = SQLiteBackend(os.path.join(TODO_DATA_DIR, f'{name}.sqlite3'),
+                                sync=TODO_SYNC, flush_interval=TODO_FLUSH_INTERVAL)
+    elif TODO_STORAGE == 'log':
+        backend = LogBackend(os.path.join(TODO_DATA_DIR, name), sync=TODO_SYNC,
+                             flush_interval=TODO_FLUSH_INTERVAL, compact_every=TODO_COMPACT_EVERY)
+    else:
+        raise ValueError(f"unknown TODO_STORAGE '{TODO_STORAGE}' (memory | log | sqlite | shared)")
+    return TodoStore(backend=backend)
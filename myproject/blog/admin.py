@@ -15,6 +15,8 @@ class CategoryAdmin(admin.ModelAdmin):
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
     list_display = ['title', 'author', 'category', 'views', 'published', 'created_at']
+    # 목록에서 행마다 author/category 를 따로 조회하지 않도록 JOIN (N+1 방지)
+    list_select_related = ['author', 'category']
     list_filter = ['published', 'category', 'created_at']
     # author__username ForieㅜKey 관꼐를 타고 검색 -> join 쿼리수행
     search_fields = ['title', 'author__username', 'content']
@@ -40,6 +42,7 @@ class PostAdmin(admin.ModelAdmin):
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
     list_display = ['author', 'post', 'created_at']
+    list_select_related = ['author', 'post']
     list_filter = ['created_at']
     search_fields = ['author__username', 'post__title', 'content']
     readonly_fields = ['created_at', 'updated_at']
@@ -48,6 +51,7 @@ class CommentAdmin(admin.ModelAdmin):
 @admin.register(Like)
 class LikeAdmin(admin.ModelAdmin):
     list_display = ['user', 'post', 'created_at']
+    list_select_related = ['user', 'post']
     list_filter = ['created_at']
     search_fields = ['user__username', 'post__title']
 
@@ -55,5 +59,6 @@ class LikeAdmin(admin.ModelAdmin):
 @admin.register(Bookmark)
 class BookmarkAdmin(admin.ModelAdmin):
     list_display = ['user', 'post', 'created_at']
+    list_select_related = ['user', 'post']
     list_filter = ['created_at']
     search_fields = ['user__username', 'post__title']
\ No newline at end of file
@@ -0,0 +1,71 @@
+# SQL 쿼리 추적 + N+1 탐지 미들웨어 (개발/스테이징용)
+# 요청 하나에서 실행된 쿼리를 모두 기록하고
+#   - 같은 SQL(파라메터만 다른)이 QUERY_TRACE_N_PLUS_ONE 번 이상 반복되면 N+1 의심으로 경고
+#     ex) 게시글 목록에서 post.author.username 을 출력 -> SELECT ... FROM auth_user WHERE id = %s 가 N번
+#         -> select_related('author', 'category') / prefetch_related('tags') 로 해결
+#   - 쿼리 수가 QUERY_BUDGET 을 넘으면 경고
+#   - QUERY_TRACE_STRICT = True 이면 경고 대신 예외 -> 테스트 클라이언트 요청이 실패함
+# 응답 헤더 X-Query-Count / X-Query-Time-Ms 로 확인 가능
+#
+# settings.py 에서 DEBUG 일 때만 MIDDLEWARE 에 등록
+# 테스트에서는 @override_settings(QUERY_BUDGET=5, QUERY_TRACE_STRICT=True) 로 요청별 예산 검사
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('blog.querytrace')
+
+
+class QueryBudgetExceeded(AssertionError):
+    '''쿼리 수 초과 또는 N+1 의심 (strict 모드)'''
+
+
+class QueryTraceMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = []   # (SQL, 실행시간 초)
+
+        def record(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries.append((sql, time.perf_counter() - started))
+
+        # 모든 DB 연결의 쿼리를 가로챔
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(record))
+            response = self.get_response(request)
+
+        total_time = sum(elapsed for _, elapsed in queries)
+        response['X-Query-Count'] = str(len(queries))
+        response['X-Query-Time-Ms'] = f'{total_time * 1000:.2f}'
+
+        problems = self.problems(queries)
+        if problems:
+            report = '\n'.join(f'  {problem}' for problem in problems)
+            message = f'{request.method} {request.path} ({len(queries)} queries, {total_time * 1000:.1f}ms)\n{report}'
+            if getattr(settings, 'QUERY_TRACE_STRICT', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def problems(self, queries):
+        '''예산 초과/N+1 의심 내용 (없으면 빈 목록)'''
+        budget = getattr(settings, 'QUERY_BUDGET', None)
+        threshold = getattr(settings, 'QUERY_TRACE_N_PLUS_ONE', 3)
+        problems = []
+        if budget is not None and len(queries) > budget:
+            problems.append(f'{len(queries)} queries (budget {budget})')
+        repeated = Counter(sql for sql, _ in queries)
+        for sql, count in repeated.most_common():
+            if count < threshold:
+                break
+            problems.append(f"N+1 suspect x{count}: {' '.join(sql.split())[:200]}")
+        return problems
@@ -38,7 +38,7 @@ class Post(models.Model):
         ordering = ['-created_at']
 
     def __str__(self):
-        return self.titleb
+        return self.title
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE,related_name='comments')
     author = models.ForeignKey(User, on_delete=models.CASCADE,related_name='comments')
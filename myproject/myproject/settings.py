@@ -50,6 +50,13 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# 요청별 SQL 쿼리 추적 + N+1 탐지 (blog/middleware.py) - 개발/스테이징에서만
+if DEBUG:
+    MIDDLEWARE.append('blog.middleware.QueryTraceMiddleware')
+QUERY_BUDGET = None             # 요청당 최대 쿼리 수 (None 이면 제한 없음)
+QUERY_TRACE_N_PLUS_ONE = 3      # 같은 SQL 이 이 횟수 이상 반복되면 N+1 의심
+QUERY_TRACE_STRICT = False      # True 면 경고 대신 예외 (테스트용)
+
 ROOT_URLCONF = 'myproject.urls'
 
 TEMPLATES = [